@@ -0,0 +1,50 @@
+"""Compare two benchmarks.suite reports case by case.
+
+Exits non-zero when any case's median slowed down by more than --threshold
+percent at a size present in both reports.
+
+Usage: python -m benchmarks.compare benchmarks/results/<base>.json benchmarks/results/<head>.json
+"""
+import argparse
+import json
+import sys
+
+
+def load_cases(path):
+    with open(path) as f:
+        report = json.load(f)
+    return report.get("commit"), {
+        (size["users"], name): result
+        for size in report["sizes"]
+        for name, result in size["cases"].items()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("base")
+    parser.add_argument("head")
+    parser.add_argument("--threshold", type=float, default=15.0, help="percent slowdown counted as a regression")
+    args = parser.parse_args()
+
+    base_commit, base = load_cases(args.base)
+    head_commit, head = load_cases(args.head)
+    print(f"{(base_commit or 'base')[:12]} -> {(head_commit or 'head')[:12]}")
+
+    regressions = []
+    for key in sorted(base.keys() & head.keys()):
+        before, after = base[key]["median_ms"], head[key]["median_ms"]
+        change = ((after - before) / before * 100) if before else 0.0
+        flag = ""
+        if change > args.threshold:
+            regressions.append(key)
+            flag = "  REGRESSION"
+        print(f"{key[0]:>7} users  {key[1]:<32} {before:>10.3f}ms -> {after:>10.3f}ms  {change:+7.1f}%{flag}")
+
+    if regressions:
+        print(f"{len(regressions)} case(s) slower than {args.threshold:.0f}%")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
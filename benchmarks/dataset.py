@@ -0,0 +1,213 @@
+"""Synthetic multi-user dataset for the benchmark suite.
+
+Users are bench<N>@bench.ethos.local, so they can be seeded incrementally
+(users first..last) and removed again without touching real accounts. All
+rows are generated server-side with generate_series; the focus and expense
+rollups are filled by their triggers exactly as in production.
+
+    python -m benchmarks.dataset seed --users 1000 --years 3
+    python -m benchmarks.dataset clear
+"""
+import argparse
+
+from database import dedicated_connection
+
+BENCH_DOMAIN = "bench.ethos.local"
+USER_TABLES = (
+    "focus_sessions", "expense_logs", "finances", "debt", "habits", "events", "weekly_planner",
+    "timetable", "future_tasks", "workout_logs", "exercise_library", "muscle_progress",
+    "active_sessions", "rankings",
+)
+ROLLUP_TABLES = ("focus_daily_rollup", "focus_lifetime_rollup", "expense_monthly_rollup")
+TELEMETRY_DAYS = 14
+
+
+def bench_user(n):
+    return f"bench{n}@{BENCH_DOMAIN}"
+
+
+# Each statement takes %(first)s / %(last)s (user numbers), %(years)s and %(telemetry_days)s
+SEED_STATEMENTS = [
+    ("users", """
+        INSERT INTO users (email, password, role)
+        SELECT 'bench' || u || '@bench.ethos.local', 'bench', 'user'
+        FROM generate_series(%(first)s, %(last)s) AS u
+        ON CONFLICT (email) DO NOTHING
+    """),
+    ("focus_sessions", """
+        INSERT INTO focus_sessions (user_email, task_name, duration_mins, session_date)
+        SELECT 'bench' || u || '@bench.ethos.local', 'Deep Work ' || n, 15 + (random() * 90)::int, d::date
+        FROM generate_series(%(first)s, %(last)s) AS u,
+             generate_series(CURRENT_DATE - make_interval(years => %(years)s), CURRENT_DATE, INTERVAL '1 day') AS d,
+             generate_series(1, 2) AS n
+    """),
+    ("expense_logs", """
+        INSERT INTO expense_logs (user_email, amount, category, description, expense_date)
+        SELECT 'bench' || u || '@bench.ethos.local', (random() * 80)::numeric(12, 2),
+               (ARRAY['Food', 'Transport', 'Rent', 'Leisure', 'Health', 'Education'])[1 + (random() * 5)::int],
+               'synthetic', d::date
+        FROM generate_series(%(first)s, %(last)s) AS u,
+             generate_series(CURRENT_DATE - make_interval(years => %(years)s), CURRENT_DATE, INTERVAL '1 day') AS d,
+             generate_series(1, 2) AS n
+    """),
+    ("finances", """
+        INSERT INTO finances (user_email, category, plan, period)
+        SELECT 'bench' || u || '@bench.ethos.local', c, 200 + (random() * 800)::int, trim(to_char(m, 'Month')) || ' ' || to_char(m, 'YYYY')
+        FROM generate_series(%(first)s, %(last)s) AS u,
+             generate_series(date_trunc('month', CURRENT_DATE) - make_interval(years => %(years)s), CURRENT_DATE, INTERVAL '1 month') AS m,
+             unnest(ARRAY['Food', 'Transport', 'Rent', 'Leisure', 'Health', 'Education']) AS c
+    """),
+    ("debt", """
+        INSERT INTO debt (user_email, category, amount, paid_out)
+        SELECT 'bench' || u || '@bench.ethos.local', 'Loan ' || n, 1000 * n, 250 * n
+        FROM generate_series(%(first)s, %(last)s) AS u, generate_series(1, 3) AS n
+    """),
+    ("habits", """
+        INSERT INTO habits (user_email, habit_name, month, year, day, status)
+        SELECT 'bench' || u || '@bench.ethos.local', 'Habit ' || h,
+               EXTRACT(MONTH FROM d), EXTRACT(YEAR FROM d), EXTRACT(DAY FROM d), random() < 0.6
+        FROM generate_series(%(first)s, %(last)s) AS u,
+             generate_series(CURRENT_DATE - make_interval(years => %(years)s), CURRENT_DATE, INTERVAL '1 day') AS d,
+             generate_series(1, 5) AS h
+    """),
+    ("events", """
+        INSERT INTO events (user_email, event_date, description, is_done, is_recurring)
+        SELECT 'bench' || u || '@bench.ethos.local', d::date, 'Event ' || to_char(d, 'YYYY-MM-DD'), d < CURRENT_DATE, random() < 0.03
+        FROM generate_series(%(first)s, %(last)s) AS u,
+             generate_series(CURRENT_DATE - make_interval(years => %(years)s), CURRENT_DATE + 90, INTERVAL '3 days') AS d
+    """),
+    ("weekly_planner", """
+        INSERT INTO weekly_planner (user_email, week_start, day_index, task_name, is_done)
+        SELECT 'bench' || u || '@bench.ethos.local', (date_trunc('week', CURRENT_DATE) - w * INTERVAL '7 days')::date,
+               day, 'Task ' || n, random() < 0.5
+        FROM generate_series(%(first)s, %(last)s) AS u, generate_series(0, 11) AS w,
+             generate_series(0, 6) AS day, generate_series(1, 3) AS n
+    """),
+    ("timetable", """
+        INSERT INTO timetable (user_email, day_name, start_time, subject, location)
+        SELECT 'bench' || u || '@bench.ethos.local',
+               (ARRAY['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday'])[day],
+               make_time(8 + 2 * slot, 0, 0), 'Subject ' || slot, 'Room ' || day
+        FROM generate_series(%(first)s, %(last)s) AS u, generate_series(1, 5) AS day, generate_series(1, 3) AS slot
+    """),
+    ("future_tasks", """
+        INSERT INTO future_tasks (user_email, task_description, category, timeframe, priority, progress)
+        SELECT 'bench' || u || '@bench.ethos.local', 'Goal ' || n, 'Career', 'This Year', 'High', (random() * 100)::int
+        FROM generate_series(%(first)s, %(last)s) AS u, generate_series(1, 8) AS n
+    """),
+    ("exercise_library", """
+        INSERT INTO exercise_library (user_email, exercise_name, muscle_group, last_weight, last_reps)
+        SELECT 'bench' || u || '@bench.ethos.local', g || ' Lift ' || n, g, 20 + random() * 80, 8
+        FROM generate_series(%(first)s, %(last)s) AS u,
+             unnest(ARRAY['Chest', 'Back', 'Legs', 'Shoulders', 'Biceps', 'Triceps']) AS g, generate_series(1, 2) AS n
+    """),
+    # Same names as exercise_library, so strength_history's join finds them: a
+    # three-day split trains two muscle groups per session
+    ("workout_logs", """
+        INSERT INTO workout_logs (user_email, exercise_name, weight, reps, sets, workout_date)
+        SELECT 'bench' || u || '@bench.ethos.local', g || ' Lift ' || n, 20 + random() * 80, 8, 3, d::date
+        FROM generate_series(%(first)s, %(last)s) AS u,
+             generate_series(CURRENT_DATE - make_interval(years => %(years)s), CURRENT_DATE, INTERVAL '2 days')
+                 WITH ORDINALITY AS s(d, k),
+             unnest(ARRAY['Chest', 'Back', 'Legs', 'Shoulders', 'Biceps', 'Triceps']) WITH ORDINALITY AS x(g, gi),
+             generate_series(1, 2) AS n
+        WHERE gi %% 3 = k %% 3
+    """),
+    ("muscle_progress", """
+        INSERT INTO muscle_progress (user_email, muscle_group, week_start, volume_sq, frequency)
+        SELECT 'bench' || u || '@bench.ethos.local', g, w::date, random() * 5000, 2
+        FROM generate_series(%(first)s, %(last)s) AS u,
+             unnest(ARRAY['Chest', 'Back', 'Legs', 'Shoulders', 'Biceps', 'Triceps']) AS g,
+             generate_series(date_trunc('week', CURRENT_DATE) - make_interval(years => %(years)s), CURRENT_DATE, INTERVAL '7 days') AS w
+        ON CONFLICT DO NOTHING
+    """),
+    ("rankings", """
+        INSERT INTO rankings (user_email, category, item_name, rank_order)
+        SELECT 'bench' || u || '@bench.ethos.local', c, CASE WHEN c LIKE '[NOTE]%%' THEN 'Notes for ' || c ELSE 'Entry ' || n END, n
+        FROM generate_series(%(first)s, %(last)s) AS u,
+             unnest(ARRAY['Books', 'Films', 'Albums', '[NOTE] Manifesto']) AS c, generate_series(0, 4) AS n
+        WHERE c NOT LIKE '[NOTE]%%' OR n = 0
+    """),
+    ("system_metrics", """
+        INSERT INTO system_metrics (timestamp, user_email, category, event_name, value, metadata)
+        SELECT ts, 'bench' || u || '@bench.ethos.local',
+               (ARRAY['PERFORMANCE', 'PERFORMANCE', 'PERFORMANCE', 'AUTH', 'ERROR'])[1 + (random() * 4)::int],
+               'Page_Load: ' || p, random() * random() * 2, jsonb_build_object('page', p)
+        FROM generate_series(%(first)s, %(last)s) AS u,
+             generate_series(NOW() - make_interval(days => %(telemetry_days)s), NOW(), INTERVAL '2 hours') AS ts,
+             unnest(ARRAY['Weekly Planner', 'Finances', 'Calendar', 'Iron Clad']) AS p
+    """),
+]
+
+
+def seed(cur, first, last, years):
+    """Seed bench users first..last (inclusive) with `years` of history; returns rows inserted per table."""
+    params = {"first": first, "last": last, "years": years, "telemetry_days": TELEMETRY_DAYS}
+    cur.execute("SELECT system_metrics_ensure_partitions(CURRENT_DATE - %s, CURRENT_DATE + 1)", (TELEMETRY_DAYS,))
+    inserted = {}
+    for table, statement in SEED_STATEMENTS:
+        cur.execute(statement, params)
+        inserted[table] = cur.rowcount
+    cur.execute("SELECT telemetry_rollup_backfill(NOW() - make_interval(days => %s))", (TELEMETRY_DAYS,))
+    return inserted
+
+
+def clear(cur, user=None):
+    """Remove one bench user's rows (or every bench user's), rollups included."""
+    pattern = user or f"%@{BENCH_DOMAIN}"
+    for table in USER_TABLES + ROLLUP_TABLES:
+        cur.execute(f"DELETE FROM {table} WHERE user_email LIKE %s", (pattern,))
+    cur.execute("DELETE FROM system_metrics WHERE user_email LIKE %s", (pattern,))
+    cur.execute("DELETE FROM users WHERE email LIKE %s", (pattern,))
+    cur.execute("SELECT telemetry_rollup_backfill(NOW() - make_interval(days => %s))", (TELEMETRY_DAYS,))
+
+
+def seeded_users(cur):
+    cur.execute("SELECT COUNT(*) FROM users WHERE email LIKE %s", (f"%@{BENCH_DOMAIN}",))
+    return cur.fetchone()[0]
+
+
+def analyze(cur):
+    for table in USER_TABLES + ROLLUP_TABLES + ("system_metrics", "telemetry_rollup_minute"):
+        cur.execute(f"ANALYZE {table}")
+
+
+def table_sizes(cur):
+    """Approximate live rows per benchmarked table (planner estimates, after analyze())."""
+    cur.execute("""
+        SELECT COALESCE(parent.relname, c.relname), SUM(GREATEST(c.reltuples, 0))::bigint
+        FROM pg_class c
+        LEFT JOIN pg_inherits i ON i.inhrelid = c.oid
+        LEFT JOIN pg_class parent ON parent.oid = i.inhparent
+        WHERE COALESCE(parent.relname, c.relname) = ANY(%s) AND c.relkind = 'r'
+        GROUP BY 1
+    """, (list(USER_TABLES + ROLLUP_TABLES + ("system_metrics",)),))
+    return dict(cur.fetchall())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("action", choices=["seed", "clear"])
+    parser.add_argument("--users", type=int, default=1000, help="total bench users wanted (existing ones are kept)")
+    parser.add_argument("--years", type=int, default=3)
+    args = parser.parse_args()
+
+    conn = dedicated_connection()
+    try:
+        with conn.cursor() as cur:
+            if args.action == "clear":
+                clear(cur)
+                print("Removed bench users")
+                return
+            have = seeded_users(cur)
+            if have < args.users:
+                inserted = seed(cur, have + 1, args.users, args.years)
+                print(f"Seeded bench{have + 1}..bench{args.users}: {inserted}")
+            analyze(cur)
+            print(f"{args.users} bench users ready")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""EXTRACT(MONTH/YEAR) predicates vs. half-open date ranges on a multi-year ledger.
+
+Builds a TEMP copy of expense_logs (dropped with the session) with
+--users x --years of synthetic daily spend, indexes it on
+(user_email, expense_date) and times the month-total query both ways.
+
+Usage: DATABASE_URL=... python -m benchmarks.date_range_predicates --users 200 --years 5
+"""
+import argparse
+import json
+import statistics
+import time
+from datetime import date
+
+from database import dedicated_connection
+from services.periods import month_range
+
+EXTRACT_QUERY = """
+    SELECT COALESCE(SUM(amount), 0) FROM bench_expense_logs
+    WHERE user_email=%s AND EXTRACT(MONTH FROM expense_date) = %s AND EXTRACT(YEAR FROM expense_date) = %s
+"""
+RANGE_QUERY = """
+    SELECT COALESCE(SUM(amount), 0) FROM bench_expense_logs
+    WHERE user_email=%s AND expense_date >= %s AND expense_date < %s
+"""
+
+
+def seed(cur, users, years):
+    cur.execute("""
+        CREATE TEMP TABLE bench_expense_logs (
+            id SERIAL PRIMARY KEY, user_email TEXT NOT NULL, amount NUMERIC(12, 2) NOT NULL,
+            category TEXT, description TEXT, expense_date DATE NOT NULL
+        ) ON COMMIT PRESERVE ROWS
+    """)
+    # Three expenses a day per user for `years` years, generated server-side
+    cur.execute("""
+        INSERT INTO bench_expense_logs (user_email, amount, category, description, expense_date)
+        SELECT 'bench' || u || '@ethos.local', (random() * 500)::numeric(12, 2), 'General', 'synthetic', d::date
+        FROM generate_series(1, %s) AS u,
+             generate_series(CURRENT_DATE - make_interval(years => %s), CURRENT_DATE, INTERVAL '1 day') AS d,
+             generate_series(1, 3) AS n
+    """, (users, years))
+    cur.execute("CREATE INDEX ON bench_expense_logs (user_email, expense_date) INCLUDE (amount)")
+    cur.execute("ANALYZE bench_expense_logs")
+
+
+def time_query(cur, query, params, iterations):
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        cur.execute(query, params)
+        cur.fetchall()
+        samples.append((time.perf_counter() - start) * 1000)
+    cur.execute("EXPLAIN (FORMAT JSON) " + query, params)
+    plan = cur.fetchone()[0][0]["Plan"]
+    return {"median_ms": round(statistics.median(samples), 3), "plan": plan["Node Type"],
+            "scan": plan.get("Plans", [{}])[0].get("Node Type")}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--iterations", type=int, default=30)
+    args = parser.parse_args()
+
+    conn = dedicated_connection()
+    try:
+        with conn.cursor() as cur:
+            seed(cur, args.users, args.years)
+            cur.execute("SELECT COUNT(*) FROM bench_expense_logs")
+            rows = cur.fetchone()[0]
+
+            today = date.today()
+            span = month_range(today.month, today.year)
+            user = "bench1@ethos.local"
+            report = {
+                "benchmark": "date_range_predicates", "rows": rows,
+                "users": args.users, "years": args.years,
+                "extract": time_query(cur, EXTRACT_QUERY, (user, today.month, today.year), args.iterations),
+                "range": time_query(cur, RANGE_QUERY, (user, span.start, span.end), args.iterations),
+            }
+    finally:
+        conn.close()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
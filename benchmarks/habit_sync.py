@@ -0,0 +1,69 @@
+"""Habit grid sync: legacy DELETE + per-cell INSERT vs. HabitService.sync_grid.
+
+Writes to a throwaway user and cleans up after itself.
+Usage: DATABASE_URL=... python -m benchmarks.habit_sync --habits 10 --days 30
+"""
+import argparse
+import json
+import random
+import time
+
+from database import execute_query, transaction
+from services.logic import HabitService
+
+BENCH_USER = "bench+habits@ethos.local"
+
+
+def legacy_sync(user, month, year, cells):
+    execute_query("DELETE FROM habits WHERE user_email=%s AND month=%s AND year=%s", (user, month, year))
+    for name, day, status in cells:
+        execute_query(
+            "INSERT INTO habits (user_email, habit_name, month, year, day, status) VALUES (%s, %s, %s, %s, %s, %s)",
+            (user, name, month, year, day, status)
+        )
+
+
+def random_grid(habits, days, density):
+    cells = set()
+    for h in range(habits):
+        ticked = {(f"Habit {h}", d, True) for d in range(1, days + 1) if random.random() < density}
+        cells |= ticked or {(f"Habit {h}", 1, False)}
+    return cells
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--habits", type=int, default=10)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--edits", type=int, default=5, help="cells flipped between loaded and saved grid")
+    args = parser.parse_args()
+    month, year = 1, 2030
+
+    loaded = random_grid(args.habits, args.days, 0.7)
+    desired = set(loaded)
+    for _ in range(args.edits):
+        name, day = f"Habit {random.randrange(args.habits)}", random.randint(1, args.days)
+        desired.symmetric_difference_update({(name, day, True)})
+
+    legacy_sync(BENCH_USER, month, year, loaded)
+    start = time.perf_counter()
+    legacy_sync(BENCH_USER, month, year, desired)
+    legacy_ms = (time.perf_counter() - start) * 1000
+
+    legacy_sync(BENCH_USER, month, year, loaded)
+    start = time.perf_counter()
+    inserted, deleted = HabitService.sync_grid(BENCH_USER, month, year, loaded, desired)
+    diff_ms = (time.perf_counter() - start) * 1000
+
+    with transaction() as cur:
+        cur.execute("DELETE FROM habits WHERE user_email=%s", (BENCH_USER,))
+
+    print(json.dumps({
+        "benchmark": "habit_sync", "cells": len(desired),
+        "before": {"statements": len(desired) + 1, "elapsed_ms": round(legacy_ms, 2)},
+        "after": {"inserted": inserted, "deleted": deleted, "elapsed_ms": round(diff_ms, 2)},
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
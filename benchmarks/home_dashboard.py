@@ -0,0 +1,61 @@
+"""Home render data latency: the six legacy card queries vs. DashboardService.
+
+Usage: DATABASE_URL=... python -m benchmarks.home_dashboard --user you@example.com
+"""
+import argparse
+import json
+import statistics
+import time
+from datetime import date, timedelta
+
+from database import fetch_query
+from services.logic import DashboardService, TimetableService
+
+
+def legacy_home_queries(user, today):
+    """The per-card queries Home.py issued before the snapshot existed."""
+    w_start = today - timedelta(days=today.weekday())
+    fetch_query("SELECT task_name, is_done FROM weekly_planner WHERE user_email=%s AND day_index=%s AND week_start=%s LIMIT 5", (user, today.weekday(), w_start))
+    fetch_query("SELECT subject, start_time FROM timetable WHERE user_email=%s AND day_name=%s ORDER BY start_time ASC LIMIT 5", (user, today.strftime('%A')))
+    fetch_query("SELECT task_description, progress FROM future_tasks WHERE user_email=%s AND progress < 100 ORDER BY progress DESC LIMIT 4", (user,))
+    fetch_query("""
+        SELECT (SELECT COALESCE(SUM(plan), 0) FROM finances WHERE user_email=%s AND period=%s) -
+               (SELECT COALESCE(SUM(amount), 0) FROM expense_logs WHERE user_email=%s AND EXTRACT(MONTH FROM expense_date) = %s AND EXTRACT(YEAR FROM expense_date) = %s)
+    """, (user, today.strftime("%B %Y"), user, today.month, today.year))
+    fetch_query("SELECT SUM(amount - paid_out) FROM debt WHERE user_email=%s", (user,))
+    fetch_query("SELECT task_name, duration_mins FROM focus_sessions WHERE user_email=%s AND session_date=%s", (user, today))
+    fetch_query("SELECT description, event_date FROM events WHERE user_email=%s AND event_date >= %s ORDER BY event_date ASC LIMIT 5", (user, today))
+
+
+def time_it(fn, iterations):
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        "median_ms": round(statistics.median(samples), 2),
+        "p95_ms": round(samples[int(len(samples) * 0.95) - 1], 2),
+        "mean_ms": round(statistics.fmean(samples), 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--user", required=True)
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    today = date.today()
+    report = {
+        "benchmark": "home_dashboard",
+        "iterations": args.iterations,
+        "before": time_it(lambda: legacy_home_queries(args.user, today), args.iterations),
+        "after": time_it(lambda: (DashboardService.fetch_snapshot(args.user, today), TimetableService.load(args.user)), args.iterations),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""Time each page's data layer on the synthetic dataset at several sizes.
+
+For every size the dataset is grown to that many bench users (see
+benchmarks.dataset), analyzed, and every case in _cases() is timed against a
+sample of users. Service functions are called through __wrapped__, so the
+process cache never answers for the database. The JSON report records the
+commit it ran on; compare two reports with benchmarks.compare.
+
+Usage: DATABASE_URL=... python -m benchmarks.suite --sizes 100,1000,5000 --years 3
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import time
+from datetime import date, datetime, timedelta, timezone
+
+from database import dedicated_connection, fetch_query
+from benchmarks.dataset import analyze, bench_user, seed, seeded_users, table_sizes
+from services.logic import (
+    CalendarService, DashboardService, FinanceService, FocusService, IronCladService,
+    TimetableService, WeeklyPlannerService,
+)
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+# The Admin page's aggregates, as issued by pages/Admin.py
+ADMIN_HEALTH = """
+    SELECT page, SUM(error_count) FROM telemetry_rollup_minute
+    WHERE bucket_start >= NOW() - INTERVAL '24 hours' AND page <> '' GROUP BY page ORDER BY page
+"""
+ADMIN_KPIS = """
+    SELECT SUM(latency_sum) / NULLIF(SUM(latency_count), 0), COALESCE(SUM(error_count), 0),
+           COALESCE(SUM(event_count) FILTER (WHERE category = 'SECURITY'), 0),
+           COALESCE(SUM(event_count) FILTER (WHERE category = 'AUTH' AND event_name = 'Login_Success'), 0)
+    FROM telemetry_rollup_minute WHERE bucket_start >= NOW() - INTERVAL '24 hours'
+"""
+ADMIN_PAGE_HISTOGRAMS = """
+    SELECT page, array_agg(n ORDER BY idx) FROM (
+        SELECT r.page, b.idx, SUM(b.n)::int AS n
+        FROM telemetry_rollup_minute r, unnest(r.latency_hist) WITH ORDINALITY AS b(n, idx)
+        WHERE r.category = 'PERFORMANCE' AND r.bucket_start >= NOW() - make_interval(hours => %s)
+        GROUP BY r.page, b.idx
+    ) s GROUP BY page
+"""
+ADMIN_FEED = """
+    SELECT timestamp, category, event_name, user_email, metadata FROM system_metrics
+    WHERE timestamp >= NOW() - INTERVAL '7 days' ORDER BY timestamp DESC LIMIT 50
+"""
+
+
+def _uncached(fn):
+    return getattr(fn, "__wrapped__", fn)
+
+
+def _cases(today):
+    period = today.strftime("%B %Y")
+    week_start = today - timedelta(days=today.weekday())
+    return {
+        "home.snapshot": lambda u: DashboardService.fetch_snapshot(u, today),
+        "finance.dashboard_metrics": lambda u: _uncached(FinanceService.get_dashboard_metrics)(u, period),
+        "finance.budget_vs_actual": lambda u: _uncached(FinanceService.get_budget_vs_actual)(u, period),
+        "finance.spend_trend": lambda u: _uncached(FinanceService.get_spend_trend)(u, 12),
+        "focus.daily_logs": lambda u: _uncached(FocusService.get_daily_logs)(u, today),
+        "focus.stats_overview": lambda u: _uncached(FocusService.get_stats_overview)(u),
+        "calendar.month_grid": lambda u: CalendarService.load_month(u, today.year, today.month),
+        "calendar.manage_list": lambda u: fetch_query(
+            "SELECT id, description, event_date FROM events WHERE user_email=%s ORDER BY event_date DESC", (u,)),
+        "planner.week": lambda u: WeeklyPlannerService.load_week(u, week_start),
+        "timetable.week": lambda u: TimetableService.load(u),
+        "iron_clad.history": lambda u: _uncached(IronCladService.strength_history)(u),
+        "iron_clad.global_evolution": lambda u: fetch_query(
+            "SELECT week_start, muscle_group, volume_sq FROM muscle_progress WHERE user_email=%s ORDER BY week_start ASC", (u,)),
+        "iron_clad.exercise_library": lambda u: fetch_query(
+            "SELECT exercise_name, muscle_group, last_weight, last_reps FROM exercise_library WHERE user_email=%s", (u,)),
+        "admin.health_map": lambda u: fetch_query(ADMIN_HEALTH, ()),
+        "admin.kpis": lambda u: fetch_query(ADMIN_KPIS, ()),
+        "admin.page_percentiles_24h": lambda u: fetch_query(ADMIN_PAGE_HISTOGRAMS, (24,)),
+        "admin.page_percentiles_7d": lambda u: fetch_query(ADMIN_PAGE_HISTOGRAMS, (168,)),
+        "admin.event_feed": lambda u: fetch_query(ADMIN_FEED, ()),
+    }
+
+
+def check_dataset(users):
+    """Refuse to time a dataset whose joins come back empty: the numbers would mean nothing."""
+    for user in users:
+        history = _uncached(IronCladService.strength_history)(user)
+        if not any(history.values()):
+            raise SystemExit(f"{user} has no Iron Clad strength history: workout_logs don't join exercise_library")
+
+
+def measure(fn, users, iterations):
+    fn(users[0])  # warm the plan and buffer cache once
+    samples = []
+    for i in range(iterations):
+        user = users[i % len(users)]
+        start = time.perf_counter()
+        fn(user)
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        "median_ms": round(statistics.median(samples), 3),
+        "p95_ms": round(samples[max(0, int(len(samples) * 0.95) - 1)], 3),
+        "mean_ms": round(statistics.fmean(samples), 3),
+    }
+
+
+def current_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="100,1000", help="comma-separated bench user counts, ascending")
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--sample", type=int, default=20, help="distinct users each case is timed against")
+    parser.add_argument("--only", default=None, help="comma-separated case name prefixes to run")
+    parser.add_argument("--out", default=None, help="report path (default: benchmarks/results/<commit>.json)")
+    args = parser.parse_args()
+
+    sizes = sorted(int(s) for s in args.sizes.split(","))
+    today = date.today()
+    cases = _cases(today)
+    if args.only:
+        prefixes = tuple(args.only.split(","))
+        cases = {name: fn for name, fn in cases.items() if name.startswith(prefixes)}
+
+    commit = current_commit()
+    report = {
+        "benchmark": "suite", "commit": commit,
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "date": str(today), "years": args.years, "iterations": args.iterations,
+        "sizes": [],
+    }
+
+    conn = dedicated_connection()
+    try:
+        for size in sizes:
+            with conn.cursor() as cur:
+                have = seeded_users(cur)
+                if have < size:
+                    seed(cur, have + 1, size, args.years)
+                analyze(cur)
+                rows = table_sizes(cur)
+            users = [bench_user(n) for n in random.sample(range(1, size + 1), min(args.sample, size))]
+            check_dataset(users)
+            results = {}
+            for name, fn in cases.items():
+                results[name] = measure(fn, users, args.iterations)
+                print(f"[{size} users] {name}: {results[name]['median_ms']}ms median, {results[name]['p95_ms']}ms p95")
+            report["sizes"].append({"users": size, "rows": rows, "cases": results})
+    finally:
+        conn.close()
+
+    out = args.out or os.path.join(RESULTS_DIR, f"{(commit or 'local')[:12]}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Report written to {out}")
+
+
+if __name__ == "__main__":
+    main()
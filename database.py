@@ -1,22 +1,191 @@
 import psycopg2
-from psycopg2 import pool
+import psycopg2.pool
 import streamlit as st
 import os
+import io
+import time
+import threading
+from contextlib import contextmanager
+from urllib.parse import urlsplit, urlunsplit
+from psycopg2 import sql
+from psycopg2.extras import execute_values
+from services.querylog import query_stats, fingerprint
+from services.tracing import span
 
 DATABASE_URL = os.environ.get('DATABASE_URL')
+# Session-mode or direct DSN for dedicated connections; a transaction-mode pooler never delivers NOTIFY
+DATABASE_DIRECT_URL = os.environ.get('DATABASE_DIRECT_URL')
+
+# --- TYPED ERRORS ---
+class DatabaseError(Exception):
+    """Base class for failures raised by the transactional write API."""
+
+class PoolUnavailableError(DatabaseError):
+    """No connection pool could be created."""
+
+class QueryError(DatabaseError):
+    """A statement failed; the surrounding transaction was rolled back."""
+
+class PoolTimeoutError(DatabaseError):
+    """No connection became free within DB_POOL_TIMEOUT seconds."""
+
+# --- CONNECTION POOL ---
+def _pool_config():
+    """Pool sizing and DSN from the environment (DATABASE_URL or the DB_* compose vars)."""
+    dsn = DATABASE_URL or "host={} dbname={} user={} password={}".format(
+        os.environ.get("DB_HOST", "localhost"), os.environ.get("DB_NAME", "ethos_hub"),
+        os.environ.get("DB_USER", "ethos_admin"), os.environ.get("DB_PASS", ""),
+    )
+    return {
+        "dsn": dsn,
+        "minconn": int(os.environ.get("DB_POOL_MIN", 1)),
+        "maxconn": int(os.environ.get("DB_POOL_MAX", 5)),
+        "timeout": float(os.environ.get("DB_POOL_TIMEOUT", 10)),
+        "retries": int(os.environ.get("DB_POOL_RETRIES", 2)),
+        "ping_after": float(os.environ.get("DB_POOL_PING_AFTER", 30)),
+        "sslmode": os.environ.get("DB_SSLMODE", "require" if DATABASE_URL else "prefer"),
+    }
+
+class EthosPool:
+    """ThreadedConnectionPool with a bounded, timed checkout and connection health checks.
+
+    psycopg2's pools raise as soon as maxconn is reached; the semaphore here
+    makes callers wait (up to `timeout`) instead, which is what lets us report
+    waiters and wait time. Connections idle longer than `ping_after` seconds
+    get a `SELECT 1` before being handed out; broken ones are discarded and
+    replaced up to `retries` times.
+    """
+
+    def __init__(self, dsn, minconn=1, maxconn=5, timeout=10.0, retries=2, ping_after=30.0, sslmode="require"):
+        self._pool = psycopg2.pool.ThreadedConnectionPool(minconn, maxconn, dsn, sslmode=sslmode)
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._lock = threading.Lock()
+        self._last_used = {}
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.retries = retries
+        self.ping_after = ping_after
+        self.in_use = 0
+        self.waiting = 0
+        self.checkouts = 0
+        self.timeouts = 0
+        self.replaced = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def _healthy(self, conn):
+        if conn.closed:
+            return False
+        last_used = self._last_used.get(id(conn))
+        if last_used is None or time.monotonic() - last_used < self.ping_after:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def getconn(self):
+        with self._lock:
+            self.waiting += 1
+        start = time.monotonic()
+        acquired = self._slots.acquire(timeout=self.timeout)
+        waited = time.monotonic() - start
+        with self._lock:
+            self.waiting -= 1
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+            if not acquired:
+                self.timeouts += 1
+        if not acquired:
+            raise PoolTimeoutError(f"No database connection free after {self.timeout:.0f}s")
+
+        try:
+            for _ in range(self.retries + 1):
+                conn = self._pool.getconn()
+                if self._healthy(conn):
+                    with self._lock:
+                        self.in_use += 1
+                        self.checkouts += 1
+                    return conn
+                self._pool.putconn(conn, close=True)
+                with self._lock:
+                    self.replaced += 1
+            raise PoolUnavailableError("Database connections keep failing health checks")
+        except Exception:
+            self._slots.release()
+            raise
+
+    def putconn(self, conn, close=False):
+        close = close or bool(conn.closed)
+        with self._lock:
+            self.in_use -= 1
+            if close:
+                self._last_used.pop(id(conn), None)
+            else:
+                self._last_used[id(conn)] = time.monotonic()
+        try:
+            self._pool.putconn(conn, close=close)
+        finally:
+            self._slots.release()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "max": self.maxconn, "in_use": self.in_use, "waiting": self.waiting,
+                "checkouts": self.checkouts, "timeouts": self.timeouts, "replaced": self.replaced,
+                "avg_wait_ms": (self.total_wait / max(self.checkouts + self.timeouts, 1)) * 1000,
+                "max_wait_ms": self.max_wait * 1000,
+            }
 
 @st.cache_resource
 def get_connection_pool():
     """Create a single pool that lasts the entire app lifecycle."""
     try:
-        # Use a smaller pool (min 1, max 5) to avoid hitting DB limits
-        return psycopg2.pool.SimpleConnectionPool(
-            1, 5, DATABASE_URL, sslmode='require'
-        )
+        return EthosPool(**_pool_config())
     except Exception as e:
         st.error(f"Critical Database Connection Error: {e}")
         return None
 
+def _session_dsn(dsn):
+    """DATABASE_DIRECT_URL, else `dsn` moved from the Supabase transaction pooler (6543) to session mode (5432)."""
+    if DATABASE_DIRECT_URL:
+        return DATABASE_DIRECT_URL
+    parts = urlsplit(dsn)
+    if parts.scheme.startswith("postgres") and parts.port == 6543:
+        return urlunsplit(parts._replace(netloc=parts.netloc.rsplit(":", 1)[0] + ":5432"))
+    return dsn
+
+def dedicated_connection():
+    """Unpooled autocommit session-mode connection for long-lived work such as LISTEN."""
+    cfg = _pool_config()
+    conn = psycopg2.connect(_session_dsn(cfg["dsn"]), sslmode=cfg["sslmode"])
+    conn.autocommit = True
+    return conn
+
+def pool_stats():
+    db_pool = get_connection_pool()
+    return db_pool.stats() if db_pool else {}
+
+@contextmanager
+def _observed(kind, query):
+    """Time one fetch/execute call into query_stats, as a child span when a trace is active."""
+    call = {"rows": 0}
+    failed = False
+    start = time.perf_counter()
+    with span(f"db.{kind}", sql=fingerprint(query)) as s:
+        try:
+            yield call
+        except Exception:
+            failed = True
+            raise
+        finally:
+            if s is not None:
+                s.attrs["rows"] = call["rows"]
+            query_stats.record(query, time.perf_counter() - start, call["rows"], failed)
+
 def execute_query(query, params=None):
     db_pool = get_connection_pool()
     if not db_pool: return
@@ -24,8 +193,9 @@ def execute_query(query, params=None):
     conn = None
     try:
         conn = db_pool.getconn()
-        with conn.cursor() as cur:
+        with _observed("execute", query) as call, conn.cursor() as cur:
             cur.execute(query, params)
+            call["rows"] = max(cur.rowcount, 0)
             conn.commit() 
     except Exception as e:
         print(f"Execute Error: {e}")
@@ -40,12 +210,87 @@ def fetch_query(query, params=None):
     conn = None
     try:
         conn = db_pool.getconn()
-        with conn.cursor() as cur:
+        with _observed("fetch", query) as call, conn.cursor() as cur:
             cur.execute(query, params)
-            return cur.fetchall()
+            rows = cur.fetchall()
+            call["rows"] = len(rows)
+            return rows
     except Exception as e:
         print(f"Fetch Error: {e}")
         return []
     finally:
         if conn:
             db_pool.putconn(conn)
+
+# --- TRANSACTIONAL BULK-WRITE API ---
+@contextmanager
+def transaction():
+    """Yield a cursor on one pooled connection; commit on exit, roll back on error."""
+    db_pool = get_connection_pool()
+    if not db_pool:
+        raise PoolUnavailableError("Database pool unavailable")
+
+    conn = db_pool.getconn()
+    try:
+        with conn.cursor() as cur:
+            yield cur
+        conn.commit()
+    except psycopg2.Error as e:
+        conn.rollback()
+        raise QueryError(str(e)) from e
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        db_pool.putconn(conn)
+
+@contextmanager
+def _cursor(cur=None):
+    """Reuse the caller's transaction cursor, or open a transaction of our own."""
+    if cur is not None:
+        yield cur
+    else:
+        with transaction() as own_cur:
+            yield own_cur
+
+def execute_many(query, rows, cur=None, page_size=500):
+    """Run `query` for every row via execute_values and return the rows affected.
+
+    `query` must contain a single `%s` where the VALUES list goes, e.g.
+    "INSERT INTO t (a, b) VALUES %s" or "DELETE FROM t USING (VALUES %s) AS d(a, b) ...".
+    """
+    rows = list(rows)
+    if not rows:
+        return 0
+    total = 0
+    with _cursor(cur) as c:
+        for i in range(0, len(rows), page_size):
+            execute_values(c, query, rows[i:i + page_size], page_size=page_size)
+            total += max(c.rowcount, 0)
+    return total
+
+def _copy_field(value):
+    # Every value is quoted, so '' (and even a literal \N) never matches the unquoted NULL marker
+    if value is None:
+        return "\\N"
+    return '"' + str(value).replace('"', '""') + '"'
+
+def bulk_insert(table, columns, rows, cur=None, method="values"):
+    """Insert `rows` into `table` with execute_values or, for large loads, COPY."""
+    rows = list(rows)
+    if not rows:
+        return 0
+    target = sql.SQL("{} ({})").format(
+        sql.Identifier(table), sql.SQL(", ").join(map(sql.Identifier, columns))
+    )
+    if method == "values":
+        with _cursor(cur) as c:
+            return execute_many(sql.SQL("INSERT INTO {} VALUES %s").format(target).as_string(c), rows, cur=c)
+    if method == "copy":
+        buf = io.StringIO()
+        buf.writelines(",".join(map(_copy_field, row)) + "\n" for row in rows)
+        buf.seek(0)
+        with _cursor(cur) as c:
+            c.copy_expert(sql.SQL("COPY {} FROM STDIN WITH (FORMAT csv, NULL '\\N')").format(target), buf)
+        return len(rows)
+    raise ValueError(f"Unknown bulk_insert method: {method}")
@@ -0,0 +1,46 @@
+"""Versioned schema migrations.
+
+Each file in versions/ is applied once, in filename order, inside its own
+transaction, and recorded in schema_migrations.
+"""
+import os
+
+VERSIONS_DIR = os.path.join(os.path.dirname(__file__), "versions")
+
+
+def available_migrations():
+    return sorted(f for f in os.listdir(VERSIONS_DIR) if f.endswith(".sql"))
+
+
+def applied_migrations(conn):
+    with conn.cursor() as cur:
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version     TEXT PRIMARY KEY,
+                applied_at  TIMESTAMPTZ NOT NULL DEFAULT NOW()
+            )
+        """)
+        cur.execute("SELECT version FROM schema_migrations")
+        return {row[0] for row in cur.fetchall()}
+
+
+def apply_migrations(conn, dry_run=False):
+    """Apply pending migrations on a non-autocommit connection; returns the versions applied."""
+    done = applied_migrations(conn)
+    conn.commit()
+    pending = [v for v in available_migrations() if v not in done]
+    for version in pending:
+        if dry_run:
+            continue
+        with open(os.path.join(VERSIONS_DIR, version)) as f:
+            ddl = f.read()
+        try:
+            with conn.cursor() as cur:
+                cur.execute(ddl)
+                cur.execute("INSERT INTO schema_migrations (version) VALUES (%s)", (version,))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        print(f"Applied {version}")
+    return pending
@@ -0,0 +1,35 @@
+"""Run pending migrations, optionally followed by the EXPLAIN check.
+
+    docker compose exec app python -m migrations
+    docker compose exec app python -m migrations --check
+"""
+import argparse
+import sys
+
+from database import dedicated_connection
+from migrations import apply_migrations
+from migrations.explain_check import check_hot_queries
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply Ethos Hub schema migrations.")
+    parser.add_argument("--dry-run", action="store_true", help="list pending migrations without applying them")
+    parser.add_argument("--check", action="store_true", help="run the sequential-scan check after migrating")
+    args = parser.parse_args()
+
+    conn = dedicated_connection()
+    conn.autocommit = False
+    try:
+        pending = apply_migrations(conn, dry_run=args.dry_run)
+        if not pending:
+            print("Schema is up to date.")
+        elif args.dry_run:
+            print("Pending: " + ", ".join(pending))
+        if args.check and check_hot_queries(conn):
+            sys.exit(1)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
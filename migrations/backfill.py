@@ -0,0 +1,37 @@
+"""Rebuild maintained rollup tables from their raw source rows.
+
+    python -m migrations.backfill focus [--user you@example.com]
+    python -m migrations.backfill telemetry [--since 2026-10-01]
+"""
+import argparse
+
+from database import dedicated_connection
+
+BACKFILLS = {
+    "focus": "SELECT focus_rollup_backfill(%(user)s)",
+    "expenses": "SELECT expense_rollup_backfill(%(user)s)",
+    "telemetry": "SELECT telemetry_rollup_backfill(COALESCE(%(since)s::timestamptz, '-infinity'))",
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("rollup", choices=sorted(BACKFILLS))
+    parser.add_argument("--user", default=None, help="rebuild one user only (default: everyone)")
+    parser.add_argument("--since", default=None, help="telemetry only: rebuild buckets from this timestamp on (default and floor: oldest retained raw partition)")
+    args = parser.parse_args()
+
+    conn = dedicated_connection()
+    conn.autocommit = False
+    try:
+        with conn.cursor() as cur:
+            cur.execute(BACKFILLS[args.rollup], {"user": args.user, "since": args.since})
+            rebuilt = cur.fetchone()[0]
+        conn.commit()
+    finally:
+        conn.close()
+    print(f"Rebuilt {rebuilt} {args.rollup} rollup rows" + (f" for {args.user}" if args.user else ""))
+
+
+if __name__ == "__main__":
+    main()
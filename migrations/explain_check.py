@@ -0,0 +1,97 @@
+"""Flag sequential scans in the plans of the app's hot queries.
+
+Seq scans are disabled for the check (SET LOCAL enable_seqscan = off), so on a
+small or empty database the planner still picks an index whenever one is
+usable; a Seq Scan in the plan therefore means no index matches the query.
+
+    python -m migrations.explain_check
+"""
+import sys
+from datetime import date
+
+from services.periods import this_month, week_range
+
+SAMPLE_USER = "explain-check@ethos.local"
+TODAY = date.today()
+MONTH_START, MONTH_END = this_month(TODAY)
+WEEK_START = week_range(TODAY).start
+
+HOT_QUERIES = {
+    "focus_daily_logs": (
+        "SELECT task_name, duration_mins FROM focus_sessions WHERE user_email=%s AND session_date=%s",
+        (SAMPLE_USER, TODAY)),
+    "focus_month_series": (
+        "SELECT session_date, SUM(duration_mins) FROM focus_sessions WHERE user_email=%s AND session_date >= %s AND session_date < %s GROUP BY session_date",
+        (SAMPLE_USER, MONTH_START, MONTH_END)),
+    "focus_stats_rollup": (
+        "SELECT SUM(total_mins) FROM focus_daily_rollup WHERE user_email=%s AND session_date >= %s",
+        (SAMPLE_USER, MONTH_START)),
+    "planner_week": (
+        "SELECT id, day_index, task_name, is_done FROM weekly_planner WHERE user_email=%s AND week_start=%s ORDER BY day_index ASC, id ASC",
+        (SAMPLE_USER, WEEK_START)),
+    "expense_month": (
+        "SELECT category, SUM(amount) FROM expense_logs WHERE user_email=%s AND expense_date >= %s AND expense_date < %s GROUP BY category",
+        (SAMPLE_USER, MONTH_START, MONTH_END)),
+    "budget_vs_actual": (
+        "SELECT f.category, f.plan, COALESCE(r.total_amount, 0) FROM finances f LEFT JOIN expense_monthly_rollup r ON r.user_email = f.user_email AND r.month = %s AND r.category = f.category WHERE f.user_email = %s AND f.period = %s",
+        (MONTH_START, SAMPLE_USER, TODAY.strftime("%B %Y"))),
+    "budget_plan": (
+        "SELECT category, plan FROM finances WHERE user_email=%s AND period=%s",
+        (SAMPLE_USER, TODAY.strftime("%B %Y"))),
+    "timetable_week": (
+        "SELECT id, day_name, start_time, subject, location FROM timetable WHERE user_email=%s ORDER BY start_time ASC, id ASC",
+        (SAMPLE_USER,)),
+    "calendar_month": (
+        "SELECT description, is_done, is_recurring, event_date FROM events WHERE user_email=%s AND ((event_date >= %s AND event_date < %s) OR (is_recurring = TRUE AND EXTRACT(MONTH FROM event_date) = %s))",
+        (SAMPLE_USER, MONTH_START, MONTH_END, TODAY.month)),
+    "upcoming_events": (
+        "SELECT description, event_date FROM events WHERE user_email=%s AND event_date >= %s ORDER BY event_date ASC LIMIT 5",
+        (SAMPLE_USER, TODAY)),
+    "habit_month": (
+        "SELECT habit_name, day, status FROM habits WHERE user_email=%s AND month=%s AND year=%s",
+        (SAMPLE_USER, TODAY.month, TODAY.year)),
+    "exercise_library": (
+        "SELECT exercise_name, muscle_group, last_weight, last_reps FROM exercise_library WHERE user_email=%s",
+        (SAMPLE_USER,)),
+    "strength_evolution": (
+        "SELECT week_start, muscle_group, volume_sq FROM muscle_progress WHERE user_email=%s ORDER BY week_start ASC",
+        (SAMPLE_USER,)),
+    "admin_24h": (
+        "SELECT category, COUNT(*) FROM system_metrics WHERE timestamp >= NOW() - INTERVAL '24 hours' GROUP BY category",
+        ()),
+}
+
+
+def _seq_scans(plan):
+    """Yield relation names of every Seq Scan node in an EXPLAIN (FORMAT JSON) plan tree."""
+    if plan.get("Node Type") == "Seq Scan":
+        yield plan.get("Relation Name")
+    for child in plan.get("Plans", []):
+        yield from _seq_scans(child)
+
+
+def check_hot_queries(conn, queries=None):
+    """Return {query_name: [relations seq-scanned]} for every query that needs attention."""
+    flagged = {}
+    for name, (query, params) in (queries or HOT_QUERIES).items():
+        with conn.cursor() as cur:
+            cur.execute("SET LOCAL enable_seqscan = off")
+            cur.execute("EXPLAIN (FORMAT JSON) " + query, params)
+            plan = cur.fetchone()[0][0]["Plan"]
+        conn.rollback()
+        scans = list(_seq_scans(plan))
+        if scans:
+            flagged[name] = scans
+        print(f"{'SEQ SCAN' if scans else 'ok':>8}  {name}" + (f"  ({', '.join(scans)})" if scans else ""))
+    return flagged
+
+
+if __name__ == "__main__":
+    from database import dedicated_connection
+
+    conn = dedicated_connection()
+    conn.autocommit = False
+    try:
+        sys.exit(1 if check_hot_queries(conn) else 0)
+    finally:
+        conn.close()
@@ -0,0 +1,37 @@
+"""Create upcoming system_metrics day partitions and expire old ones.
+
+The telemetry writer does this hourly; run it by hand after downtime or to
+apply a new retention immediately. Defaults come from TELEMETRY_* settings;
+retention is off unless TELEMETRY_RETENTION_DAYS (or --retain-days) is set, and
+expired partitions are DROPPED, taking their raw events with them, unless
+--archive / TELEMETRY_ARCHIVE_EXPIRED detaches them instead.
+
+    python -m migrations.partitions [--ahead 7] [--retain-days 0] [--archive]
+"""
+import argparse
+
+from database import dedicated_connection
+from services.observability import maintain_partitions, retention_settings
+
+
+def main():
+    defaults = retention_settings()
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--ahead", type=int, default=defaults["ahead_days"], help="days of partitions to create ahead")
+    parser.add_argument("--retain-days", type=int, default=defaults["retain_days"], help="expire partitions older than this (0 keeps all)")
+    parser.add_argument("--archive", action="store_true", default=defaults["archive"], help="detach expired partitions instead of dropping them")
+    args = parser.parse_args()
+
+    conn = dedicated_connection()
+    conn.autocommit = False
+    try:
+        with conn.cursor() as cur:
+            created, expired = maintain_partitions(cur, args.ahead, args.retain_days, args.archive)
+        conn.commit()
+    finally:
+        conn.close()
+    print(f"Created {created} partitions, {'archived' if args.archive else 'dropped'} {expired}")
+
+
+if __name__ == "__main__":
+    main()
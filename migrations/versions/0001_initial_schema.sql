@@ -0,0 +1,143 @@
+-- Tables the pages assume. IF NOT EXISTS so this can be applied to a database
+-- that was created by hand before migrations existed.
+
+CREATE TABLE IF NOT EXISTS users (
+    email       TEXT PRIMARY KEY,
+    password    TEXT NOT NULL,
+    role        TEXT NOT NULL DEFAULT 'user'
+);
+
+CREATE TABLE IF NOT EXISTS system_metrics (
+    id          BIGSERIAL PRIMARY KEY,
+    timestamp   TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    user_email  TEXT,
+    category    TEXT NOT NULL,
+    event_name  TEXT NOT NULL,
+    value       DOUBLE PRECISION NOT NULL DEFAULT 0,
+    metadata    JSONB NOT NULL DEFAULT '{}'
+);
+
+CREATE TABLE IF NOT EXISTS weekly_planner (
+    id          SERIAL PRIMARY KEY,
+    user_email  TEXT NOT NULL,
+    week_start  DATE NOT NULL,
+    day_index   SMALLINT NOT NULL CHECK (day_index BETWEEN 0 AND 6),
+    task_name   TEXT NOT NULL,
+    is_done     BOOLEAN NOT NULL DEFAULT FALSE
+);
+
+CREATE TABLE IF NOT EXISTS timetable (
+    id          SERIAL PRIMARY KEY,
+    user_email  TEXT NOT NULL,
+    day_name    TEXT NOT NULL,
+    start_time  TIME NOT NULL,
+    subject     TEXT NOT NULL,
+    location    TEXT
+);
+
+CREATE TABLE IF NOT EXISTS future_tasks (
+    id                SERIAL PRIMARY KEY,
+    user_email        TEXT NOT NULL,
+    task_description  TEXT NOT NULL,
+    category          TEXT,
+    timeframe         TEXT,
+    priority          TEXT,
+    progress          DOUBLE PRECISION NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS events (
+    id            SERIAL PRIMARY KEY,
+    user_email    TEXT NOT NULL,
+    event_date    DATE NOT NULL,
+    description   TEXT NOT NULL,
+    is_done       BOOLEAN NOT NULL DEFAULT FALSE,
+    is_recurring  BOOLEAN NOT NULL DEFAULT FALSE
+);
+
+CREATE TABLE IF NOT EXISTS finances (
+    id          SERIAL PRIMARY KEY,
+    user_email  TEXT NOT NULL,
+    category    TEXT NOT NULL,
+    plan        NUMERIC(12, 2) NOT NULL DEFAULT 0,
+    period      TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS expense_logs (
+    id            SERIAL PRIMARY KEY,
+    user_email    TEXT NOT NULL,
+    amount        NUMERIC(12, 2) NOT NULL CHECK (amount >= 0),
+    category      TEXT,
+    description   TEXT,
+    expense_date  DATE NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS debt (
+    id          SERIAL PRIMARY KEY,
+    user_email  TEXT NOT NULL,
+    category    TEXT NOT NULL,
+    amount      NUMERIC(12, 2) NOT NULL DEFAULT 0,
+    paid_out    NUMERIC(12, 2) NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS focus_sessions (
+    id             SERIAL PRIMARY KEY,
+    user_email     TEXT NOT NULL,
+    task_name      TEXT,
+    duration_mins  INTEGER NOT NULL CHECK (duration_mins >= 0),
+    session_date   DATE NOT NULL
+);
+
+-- One running stopwatch per user
+CREATE TABLE IF NOT EXISTS active_sessions (
+    user_email           TEXT PRIMARY KEY,
+    task_name            TEXT NOT NULL,
+    start_time           TIMESTAMP NOT NULL,
+    is_paused            BOOLEAN NOT NULL DEFAULT FALSE,
+    accumulated_seconds  INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS habits (
+    id          SERIAL PRIMARY KEY,
+    user_email  TEXT NOT NULL,
+    habit_name  TEXT NOT NULL,
+    month       SMALLINT NOT NULL CHECK (month BETWEEN 1 AND 12),
+    year        SMALLINT NOT NULL,
+    day         SMALLINT NOT NULL CHECK (day BETWEEN 1 AND 31),
+    status      BOOLEAN NOT NULL DEFAULT FALSE
+);
+
+CREATE TABLE IF NOT EXISTS rankings (
+    id          SERIAL PRIMARY KEY,
+    user_email  TEXT NOT NULL,
+    category    TEXT NOT NULL,
+    item_name   TEXT NOT NULL DEFAULT '',
+    rank_order  INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS workout_logs (
+    id             SERIAL PRIMARY KEY,
+    user_email     TEXT NOT NULL,
+    exercise_name  TEXT NOT NULL,
+    weight         DOUBLE PRECISION NOT NULL DEFAULT 0,
+    reps           INTEGER NOT NULL DEFAULT 0,
+    sets           INTEGER NOT NULL DEFAULT 0,
+    workout_date   DATE NOT NULL DEFAULT CURRENT_DATE
+);
+
+CREATE TABLE IF NOT EXISTS exercise_library (
+    id             SERIAL PRIMARY KEY,
+    user_email     TEXT NOT NULL,
+    exercise_name  TEXT NOT NULL,
+    muscle_group   TEXT NOT NULL,
+    last_weight    DOUBLE PRECISION NOT NULL DEFAULT 0,
+    last_reps      INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS muscle_progress (
+    id            SERIAL PRIMARY KEY,
+    user_email    TEXT NOT NULL,
+    muscle_group  TEXT NOT NULL,
+    week_start    DATE NOT NULL,
+    volume_sq     DOUBLE PRECISION NOT NULL DEFAULT 0,
+    frequency     INTEGER NOT NULL DEFAULT 0
+);
@@ -0,0 +1,59 @@
+-- Every hot query filters on user_email plus a date or key column; these
+-- composite (and, where the query only needs a few columns, covering)
+-- indexes match those predicates column for column.
+
+-- Iron Clad session commit: INSERT ... ON CONFLICT (user_email, exercise_name)
+CREATE UNIQUE INDEX IF NOT EXISTS exercise_library_user_exercise_key
+    ON exercise_library (user_email, exercise_name);
+CREATE INDEX IF NOT EXISTS exercise_library_user_group_idx
+    ON exercise_library (user_email, muscle_group);
+
+-- Neural Lock stats/logs and the Home focus card
+CREATE INDEX IF NOT EXISTS focus_sessions_user_date_idx
+    ON focus_sessions (user_email, session_date) INCLUDE (duration_mins);
+
+-- Weekly planner week loader and Home task card
+CREATE INDEX IF NOT EXISTS weekly_planner_user_week_day_idx
+    ON weekly_planner (user_email, week_start, day_index);
+
+-- Finances budget engine and dashboard remaining budget
+CREATE INDEX IF NOT EXISTS expense_logs_user_date_idx
+    ON expense_logs (user_email, expense_date) INCLUDE (amount, category);
+CREATE INDEX IF NOT EXISTS finances_user_period_idx
+    ON finances (user_email, period);
+CREATE INDEX IF NOT EXISTS debt_user_idx
+    ON debt (user_email);
+
+-- Timetable loader
+CREATE INDEX IF NOT EXISTS timetable_user_day_start_idx
+    ON timetable (user_email, day_name, start_time);
+
+-- Calendar month index and Home upcoming events; recurring events are few
+CREATE INDEX IF NOT EXISTS events_user_date_idx
+    ON events (user_email, event_date);
+CREATE INDEX IF NOT EXISTS events_user_recurring_idx
+    ON events (user_email) WHERE is_recurring;
+
+-- Habit Lab month grid
+CREATE INDEX IF NOT EXISTS habits_user_year_month_idx
+    ON habits (user_email, year, month);
+
+-- Blueprint card: open tasks by progress
+CREATE INDEX IF NOT EXISTS future_tasks_user_progress_idx
+    ON future_tasks (user_email, progress);
+
+-- Pantheon tables
+CREATE INDEX IF NOT EXISTS rankings_user_category_idx
+    ON rankings (user_email, category, rank_order);
+
+-- Iron Clad history and strength evolution
+CREATE INDEX IF NOT EXISTS workout_logs_user_exercise_date_idx
+    ON workout_logs (user_email, exercise_name, workout_date);
+CREATE INDEX IF NOT EXISTS muscle_progress_user_week_idx
+    ON muscle_progress (user_email, week_start);
+
+-- Admin System Watch: everything is a time window
+CREATE INDEX IF NOT EXISTS system_metrics_timestamp_idx
+    ON system_metrics (timestamp);
+CREATE INDEX IF NOT EXISTS system_metrics_category_timestamp_idx
+    ON system_metrics (category, timestamp);
@@ -0,0 +1,92 @@
+-- Per-day focus totals plus per-user lifetime totals, maintained by a trigger
+-- on focus_sessions, so FocusService stats never scan raw session history.
+
+CREATE TABLE IF NOT EXISTS focus_daily_rollup (
+    user_email     TEXT NOT NULL,
+    session_date   DATE NOT NULL,
+    total_mins     INTEGER NOT NULL DEFAULT 0,
+    session_count  INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_email, session_date)
+);
+
+CREATE TABLE IF NOT EXISTS focus_lifetime_rollup (
+    user_email   TEXT PRIMARY KEY,
+    total_mins   BIGINT NOT NULL DEFAULT 0,
+    active_days  INTEGER NOT NULL DEFAULT 0
+);
+
+-- Add a (minutes, sessions) delta to one user-day and keep the lifetime row in step.
+CREATE OR REPLACE FUNCTION focus_rollup_apply(p_user TEXT, p_date DATE, p_mins INTEGER, p_count INTEGER)
+RETURNS VOID AS $$
+DECLARE
+    new_count  INTEGER;
+    day_delta  INTEGER := 0;
+BEGIN
+    INSERT INTO focus_daily_rollup AS r (user_email, session_date, total_mins, session_count)
+    VALUES (p_user, p_date, p_mins, p_count)
+    ON CONFLICT (user_email, session_date) DO UPDATE
+        SET total_mins = r.total_mins + EXCLUDED.total_mins,
+            session_count = r.session_count + EXCLUDED.session_count
+    RETURNING session_count INTO new_count;
+
+    IF new_count <= 0 THEN
+        DELETE FROM focus_daily_rollup WHERE user_email = p_user AND session_date = p_date;
+        day_delta := -1;
+    ELSIF p_count > 0 AND new_count = p_count THEN
+        day_delta := 1;
+    END IF;
+
+    INSERT INTO focus_lifetime_rollup AS l (user_email, total_mins, active_days)
+    VALUES (p_user, p_mins, day_delta)
+    ON CONFLICT (user_email) DO UPDATE
+        SET total_mins = l.total_mins + EXCLUDED.total_mins,
+            active_days = l.active_days + EXCLUDED.active_days;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION focus_sessions_rollup_trigger()
+RETURNS TRIGGER AS $$
+BEGIN
+    -- NEW before OLD so an in-place edit never empties (and deletes) the day row
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM focus_rollup_apply(NEW.user_email, NEW.session_date, NEW.duration_mins, 1);
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM focus_rollup_apply(OLD.user_email, OLD.session_date, -OLD.duration_mins, -1);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS focus_sessions_rollup ON focus_sessions;
+CREATE TRIGGER focus_sessions_rollup
+    AFTER INSERT OR UPDATE OF user_email, session_date, duration_mins OR DELETE ON focus_sessions
+    FOR EACH ROW EXECUTE FUNCTION focus_sessions_rollup_trigger();
+
+-- Rebuild the rollups from raw sessions, for one user or (NULL) everyone.
+CREATE OR REPLACE FUNCTION focus_rollup_backfill(p_user TEXT DEFAULT NULL)
+RETURNS INTEGER AS $$
+DECLARE
+    rebuilt INTEGER;
+BEGIN
+    DELETE FROM focus_daily_rollup WHERE p_user IS NULL OR user_email = p_user;
+    DELETE FROM focus_lifetime_rollup WHERE p_user IS NULL OR user_email = p_user;
+
+    INSERT INTO focus_daily_rollup (user_email, session_date, total_mins, session_count)
+    SELECT user_email, session_date, SUM(duration_mins), COUNT(*)
+    FROM focus_sessions
+    WHERE p_user IS NULL OR user_email = p_user
+    GROUP BY user_email, session_date;
+    GET DIAGNOSTICS rebuilt = ROW_COUNT;
+
+    INSERT INTO focus_lifetime_rollup (user_email, total_mins, active_days)
+    SELECT user_email, SUM(total_mins), COUNT(*)
+    FROM focus_daily_rollup
+    WHERE p_user IS NULL OR user_email = p_user
+    GROUP BY user_email;
+
+    RETURN rebuilt;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT focus_rollup_backfill(NULL);
@@ -0,0 +1,67 @@
+-- Per-(user, month, category) spend, maintained by a trigger on expense_logs,
+-- so Planned vs. Actual and spend trends never scan raw ledger rows.
+
+CREATE TABLE IF NOT EXISTS expense_monthly_rollup (
+    user_email     TEXT NOT NULL,
+    month          DATE NOT NULL,            -- first day of the month
+    category       TEXT NOT NULL DEFAULT '',
+    total_amount   NUMERIC(14, 2) NOT NULL DEFAULT 0,
+    expense_count  INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_email, month, category)
+);
+
+CREATE OR REPLACE FUNCTION expense_rollup_apply(p_user TEXT, p_date DATE, p_category TEXT, p_amount NUMERIC, p_count INTEGER)
+RETURNS VOID AS $$
+DECLARE
+    new_count INTEGER;
+BEGIN
+    INSERT INTO expense_monthly_rollup AS r (user_email, month, category, total_amount, expense_count)
+    VALUES (p_user, date_trunc('month', p_date)::date, COALESCE(p_category, ''), p_amount, p_count)
+    ON CONFLICT (user_email, month, category) DO UPDATE
+        SET total_amount = r.total_amount + EXCLUDED.total_amount,
+            expense_count = r.expense_count + EXCLUDED.expense_count
+    RETURNING expense_count INTO new_count;
+
+    IF new_count <= 0 THEN
+        DELETE FROM expense_monthly_rollup
+        WHERE user_email = p_user AND month = date_trunc('month', p_date)::date AND category = COALESCE(p_category, '');
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION expense_logs_rollup_trigger()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM expense_rollup_apply(NEW.user_email, NEW.expense_date, NEW.category, NEW.amount, 1);
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM expense_rollup_apply(OLD.user_email, OLD.expense_date, OLD.category, -OLD.amount, -1);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS expense_logs_rollup ON expense_logs;
+CREATE TRIGGER expense_logs_rollup
+    AFTER INSERT OR UPDATE OF user_email, expense_date, category, amount OR DELETE ON expense_logs
+    FOR EACH ROW EXECUTE FUNCTION expense_logs_rollup_trigger();
+
+CREATE OR REPLACE FUNCTION expense_rollup_backfill(p_user TEXT DEFAULT NULL)
+RETURNS INTEGER AS $$
+DECLARE
+    rebuilt INTEGER;
+BEGIN
+    DELETE FROM expense_monthly_rollup WHERE p_user IS NULL OR user_email = p_user;
+
+    INSERT INTO expense_monthly_rollup (user_email, month, category, total_amount, expense_count)
+    SELECT user_email, date_trunc('month', expense_date)::date, COALESCE(category, ''), SUM(amount), COUNT(*)
+    FROM expense_logs
+    WHERE p_user IS NULL OR user_email = p_user
+    GROUP BY 1, 2, 3;
+    GET DIAGNOSTICS rebuilt = ROW_COUNT;
+    RETURN rebuilt;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT expense_rollup_backfill(NULL);
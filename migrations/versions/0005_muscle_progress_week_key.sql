@@ -0,0 +1,13 @@
+-- One muscle_progress row per (user, group, week) so the session commit can
+-- upsert it with INSERT ... ON CONFLICT instead of a read-modify-write.
+-- Where duplicates exist only the newest row (highest id) is kept; the older ones are deleted.
+
+DELETE FROM muscle_progress a
+USING muscle_progress b
+WHERE a.user_email = b.user_email
+  AND a.muscle_group = b.muscle_group
+  AND a.week_start = b.week_start
+  AND a.id < b.id;
+
+CREATE UNIQUE INDEX IF NOT EXISTS muscle_progress_user_group_week_key
+    ON muscle_progress (user_email, muscle_group, week_start);
@@ -0,0 +1,54 @@
+-- Per-minute telemetry buckets the Admin page reads instead of scanning raw
+-- system_metrics. The telemetry writer upserts them in the same transaction
+-- as each raw batch. latency_hist counts PERFORMANCE values (seconds) in the
+-- buckets [0, .05) [.05, .1) [.1, .2) [.2, .5) [.5, 1) [1, 2) [2, 5) [5, inf).
+
+CREATE TABLE IF NOT EXISTS telemetry_rollup_minute (
+    bucket_start   TIMESTAMPTZ NOT NULL,
+    category       TEXT NOT NULL,
+    event_name     TEXT NOT NULL,
+    page           TEXT NOT NULL DEFAULT '',
+    event_count    INTEGER NOT NULL DEFAULT 0,
+    error_count    INTEGER NOT NULL DEFAULT 0,
+    latency_count  INTEGER NOT NULL DEFAULT 0,
+    latency_sum    DOUBLE PRECISION NOT NULL DEFAULT 0,
+    latency_hist   INTEGER[] NOT NULL DEFAULT '{0,0,0,0,0,0,0,0}',
+    PRIMARY KEY (bucket_start, category, event_name, page)
+);
+
+-- Fold raw rows newer than `since` into the buckets (e.g. history from before this migration).
+CREATE OR REPLACE FUNCTION telemetry_rollup_backfill(since TIMESTAMPTZ DEFAULT '-infinity')
+RETURNS INTEGER AS $$
+DECLARE
+    rebuilt INTEGER;
+BEGIN
+    DELETE FROM telemetry_rollup_minute WHERE bucket_start >= date_trunc('minute', since);
+
+    INSERT INTO telemetry_rollup_minute
+        (bucket_start, category, event_name, page, event_count, error_count, latency_count, latency_sum, latency_hist)
+    SELECT
+        date_trunc('minute', timestamp), category, event_name,
+        COALESCE(metadata->>'page', CASE WHEN event_name LIKE 'Page\_Load: %' THEN substr(event_name, 12) END, ''),
+        COUNT(*),
+        COUNT(*) FILTER (WHERE category = 'ERROR'),
+        COUNT(*) FILTER (WHERE category = 'PERFORMANCE'),
+        COALESCE(SUM(value) FILTER (WHERE category = 'PERFORMANCE'), 0),
+        ARRAY[
+            COUNT(*) FILTER (WHERE category = 'PERFORMANCE' AND value < 0.05),
+            COUNT(*) FILTER (WHERE category = 'PERFORMANCE' AND value >= 0.05 AND value < 0.1),
+            COUNT(*) FILTER (WHERE category = 'PERFORMANCE' AND value >= 0.1 AND value < 0.2),
+            COUNT(*) FILTER (WHERE category = 'PERFORMANCE' AND value >= 0.2 AND value < 0.5),
+            COUNT(*) FILTER (WHERE category = 'PERFORMANCE' AND value >= 0.5 AND value < 1),
+            COUNT(*) FILTER (WHERE category = 'PERFORMANCE' AND value >= 1 AND value < 2),
+            COUNT(*) FILTER (WHERE category = 'PERFORMANCE' AND value >= 2 AND value < 5),
+            COUNT(*) FILTER (WHERE category = 'PERFORMANCE' AND value >= 5)
+        ]::INTEGER[]
+    FROM system_metrics
+    WHERE timestamp >= date_trunc('minute', since)
+    GROUP BY 1, 2, 3, 4;
+    GET DIAGNOSTICS rebuilt = ROW_COUNT;
+    RETURN rebuilt;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT telemetry_rollup_backfill();
@@ -0,0 +1,51 @@
+-- Replace the coarse 8-bucket latency histogram with 62 log-scale buckets
+-- (1ms growing 20% per bucket, matching services.observability.LATENCY_BOUNDS)
+-- so Admin can read p50/p95/p99 from the rollup over any window.
+
+CREATE OR REPLACE FUNCTION telemetry_latency_bounds()
+RETURNS DOUBLE PRECISION[] AS $$
+    SELECT ARRAY(SELECT round((0.001 * 1.2 ^ i)::numeric, 6)::double precision FROM generate_series(0, 60) AS i)
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Count 0-based bucket slots (width_bucket results) into a full histogram array.
+CREATE OR REPLACE FUNCTION telemetry_latency_hist(slots INTEGER[])
+RETURNS INTEGER[] AS $$
+    SELECT ARRAY(
+        SELECT COUNT(x)::integer
+        FROM generate_series(0, 61) AS s
+        LEFT JOIN unnest(COALESCE(slots, '{}')) AS x ON x = s
+        GROUP BY s ORDER BY s
+    )
+$$ LANGUAGE sql IMMUTABLE;
+
+ALTER TABLE telemetry_rollup_minute ALTER COLUMN latency_hist SET DEFAULT array_fill(0, ARRAY[62]);
+
+CREATE OR REPLACE FUNCTION telemetry_rollup_backfill(since TIMESTAMPTZ DEFAULT '-infinity')
+RETURNS INTEGER AS $$
+DECLARE
+    rebuilt INTEGER;
+BEGIN
+    DELETE FROM telemetry_rollup_minute WHERE bucket_start >= date_trunc('minute', since);
+
+    INSERT INTO telemetry_rollup_minute
+        (bucket_start, category, event_name, page, event_count, error_count, latency_count, latency_sum, latency_hist)
+    SELECT
+        date_trunc('minute', timestamp), category, event_name,
+        COALESCE(metadata->>'page', CASE WHEN event_name LIKE 'Page\_Load: %' THEN substr(event_name, 12) END, ''),
+        COUNT(*),
+        COUNT(*) FILTER (WHERE category = 'ERROR'),
+        COUNT(*) FILTER (WHERE category = 'PERFORMANCE'),
+        COALESCE(SUM(value) FILTER (WHERE category = 'PERFORMANCE'), 0),
+        telemetry_latency_hist(
+            array_agg(width_bucket(value, telemetry_latency_bounds())) FILTER (WHERE category = 'PERFORMANCE')
+        )
+    FROM system_metrics
+    WHERE timestamp >= date_trunc('minute', since)
+    GROUP BY 1, 2, 3, 4;
+    GET DIAGNOSTICS rebuilt = ROW_COUNT;
+    RETURN rebuilt;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Existing buckets carry the old 8-slot arrays; rebuild them all at the new resolution.
+SELECT telemetry_rollup_backfill();
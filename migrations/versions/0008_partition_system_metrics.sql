@@ -0,0 +1,85 @@
+-- Move system_metrics to native range partitioning by day (server time zone),
+-- so Admin's timestamp-bounded reads prune to a few partitions and retention
+-- drops whole partitions instead of running bulk DELETEs. Partitions are
+-- created ahead of time and expired by system_metrics_ensure_partitions /
+-- system_metrics_expire_partitions, which the telemetry writer runs hourly.
+
+ALTER TABLE system_metrics RENAME TO system_metrics_legacy;
+ALTER SEQUENCE system_metrics_id_seq RENAME TO system_metrics_legacy_id_seq;
+ALTER TABLE system_metrics_legacy RENAME CONSTRAINT system_metrics_pkey TO system_metrics_legacy_pkey;
+DROP INDEX IF EXISTS system_metrics_timestamp_idx;
+DROP INDEX IF EXISTS system_metrics_category_timestamp_idx;
+
+CREATE TABLE system_metrics (
+    id          BIGSERIAL,
+    timestamp   TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    user_email  TEXT,
+    category    TEXT NOT NULL,
+    event_name  TEXT NOT NULL,
+    value       DOUBLE PRECISION NOT NULL DEFAULT 0,
+    metadata    JSONB NOT NULL DEFAULT '{}',
+    PRIMARY KEY (id, timestamp)
+) PARTITION BY RANGE (timestamp);
+
+CREATE INDEX system_metrics_timestamp_idx ON system_metrics (timestamp);
+CREATE INDEX system_metrics_category_timestamp_idx ON system_metrics (category, timestamp);
+
+-- Create the daily partitions system_metrics_pYYYYMMDD for from_day..to_day that are missing.
+CREATE OR REPLACE FUNCTION system_metrics_ensure_partitions(from_day DATE, to_day DATE)
+RETURNS INTEGER AS $$
+DECLARE
+    d DATE := from_day;
+    part TEXT;
+    created INTEGER := 0;
+BEGIN
+    WHILE d <= to_day LOOP
+        part := 'system_metrics_p' || to_char(d, 'YYYYMMDD');
+        IF to_regclass(part) IS NULL THEN
+            EXECUTE format('CREATE TABLE %I PARTITION OF system_metrics FOR VALUES FROM (%L) TO (%L)',
+                           part, d::timestamptz, (d + 1)::timestamptz);
+            created := created + 1;
+        END IF;
+        d := d + 1;
+    END LOOP;
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Drop (or, with archive, detach and keep as standalone tables) partitions older than retain_days.
+CREATE OR REPLACE FUNCTION system_metrics_expire_partitions(retain_days INTEGER, archive BOOLEAN DEFAULT FALSE)
+RETURNS INTEGER AS $$
+DECLARE
+    part RECORD;
+    removed INTEGER := 0;
+BEGIN
+    FOR part IN
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'system_metrics'::regclass
+          AND c.relname ~ '^system_metrics_p[0-9]{8}$'
+          AND to_date(substr(c.relname, 17), 'YYYYMMDD') < current_date - retain_days
+        ORDER BY c.relname
+    LOOP
+        IF archive THEN
+            EXECUTE format('ALTER TABLE system_metrics DETACH PARTITION %I', part.relname);
+        ELSE
+            EXECUTE format('DROP TABLE %I', part.relname);
+        END IF;
+        removed := removed + 1;
+    END LOOP;
+    RETURN removed;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT system_metrics_ensure_partitions(
+    COALESCE((SELECT min(timestamp)::date FROM system_metrics_legacy), current_date),
+    current_date + 7
+);
+
+INSERT INTO system_metrics (id, timestamp, user_email, category, event_name, value, metadata)
+SELECT id, timestamp, user_email, category, event_name, value, metadata FROM system_metrics_legacy;
+
+SELECT setval('system_metrics_id_seq', COALESCE((SELECT max(id) FROM system_metrics_legacy), 0) + 1, false);
+
+DROP TABLE system_metrics_legacy;
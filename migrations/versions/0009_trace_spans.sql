@@ -0,0 +1,16 @@
+-- Span trees of traced page runs, written when TRACE_EXPORT=db.
+
+CREATE TABLE IF NOT EXISTS trace_spans (
+    trace_id     TEXT NOT NULL,
+    span_id      TEXT NOT NULL,
+    parent_id    TEXT,
+    name         TEXT NOT NULL,
+    started_at   TIMESTAMPTZ NOT NULL,
+    duration_ms  DOUBLE PRECISION NOT NULL,
+    attrs        JSONB NOT NULL DEFAULT '{}',
+    PRIMARY KEY (trace_id, span_id)
+);
+
+-- Admin lists recent traces by their root span
+CREATE INDEX IF NOT EXISTS trace_spans_root_started_idx
+    ON trace_spans (started_at) WHERE parent_id IS NULL;
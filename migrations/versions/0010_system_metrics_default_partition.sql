@@ -0,0 +1,102 @@
+-- Catch telemetry rows outside the pre-created day partitions (clock skew, a
+-- late flush after downtime) in a DEFAULT partition instead of failing the
+-- whole writer batch with "no partition found". Partition maintenance moves
+-- such rows into their day partitions, so retention treats them like any other.
+-- Also stops a telemetry rollup rebuild from deleting buckets older than the
+-- raw rows that are still retained.
+
+CREATE TABLE IF NOT EXISTS system_metrics_default PARTITION OF system_metrics DEFAULT;
+
+-- A day partition cannot be created while the default partition holds rows for
+-- that day: build it standalone, move the rows over, then attach it.
+CREATE OR REPLACE FUNCTION system_metrics_ensure_partitions(from_day DATE, to_day DATE)
+RETURNS INTEGER AS $$
+DECLARE
+    d DATE := from_day;
+    part TEXT;
+    created INTEGER := 0;
+BEGIN
+    WHILE d <= to_day LOOP
+        part := 'system_metrics_p' || to_char(d, 'YYYYMMDD');
+        IF to_regclass(part) IS NULL THEN
+            IF EXISTS (SELECT 1 FROM system_metrics_default
+                       WHERE timestamp >= d::timestamptz AND timestamp < (d + 1)::timestamptz) THEN
+                EXECUTE format('CREATE TABLE %I (LIKE system_metrics INCLUDING DEFAULTS)', part);
+                EXECUTE format('WITH moved AS (DELETE FROM system_metrics_default
+                                    WHERE timestamp >= %L AND timestamp < %L RETURNING *)
+                                INSERT INTO %I SELECT * FROM moved',
+                               d::timestamptz, (d + 1)::timestamptz, part);
+                EXECUTE format('ALTER TABLE system_metrics ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                               part, d::timestamptz, (d + 1)::timestamptz);
+            ELSE
+                EXECUTE format('CREATE TABLE %I PARTITION OF system_metrics FOR VALUES FROM (%L) TO (%L)',
+                               part, d::timestamptz, (d + 1)::timestamptz);
+            END IF;
+            created := created + 1;
+        END IF;
+        d := d + 1;
+    END LOOP;
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Give every day that has rows in the default partition its own partition.
+CREATE OR REPLACE FUNCTION system_metrics_rehome_default()
+RETURNS INTEGER AS $$
+DECLARE
+    day DATE;
+    created INTEGER := 0;
+BEGIN
+    FOR day IN SELECT DISTINCT timestamp::date FROM system_metrics_default ORDER BY 1 LOOP
+        created := created + system_metrics_ensure_partitions(day, day);
+    END LOOP;
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Oldest timestamp raw telemetry is still retained from: the lower bound of the
+-- oldest day partition (stray rows in the default partition are rehomed into
+-- day partitions by maintenance before retention runs).
+CREATE OR REPLACE FUNCTION system_metrics_retained_since()
+RETURNS TIMESTAMPTZ AS $$
+    SELECT min(to_date(substr(c.relname, 17), 'YYYYMMDD'))::timestamptz
+    FROM pg_inherits i
+    JOIN pg_class c ON c.oid = i.inhrelid
+    WHERE i.inhparent = 'system_metrics'::regclass
+      AND c.relname ~ '^system_metrics_p[0-9]{8}$';
+$$ LANGUAGE sql STABLE;
+
+-- Rebuilds never reach back past the retained raw rows: buckets older than
+-- that are the only record left of expired partitions and are kept.
+CREATE OR REPLACE FUNCTION telemetry_rollup_backfill(since TIMESTAMPTZ DEFAULT '-infinity')
+RETURNS INTEGER AS $$
+DECLARE
+    retained TIMESTAMPTZ := system_metrics_retained_since();
+    rebuilt INTEGER;
+BEGIN
+    IF retained IS NULL THEN
+        RETURN 0;
+    END IF;
+    since := date_trunc('minute', GREATEST(since, retained));
+
+    DELETE FROM telemetry_rollup_minute WHERE bucket_start >= since;
+
+    INSERT INTO telemetry_rollup_minute
+        (bucket_start, category, event_name, page, event_count, error_count, latency_count, latency_sum, latency_hist)
+    SELECT
+        date_trunc('minute', timestamp), category, event_name,
+        COALESCE(metadata->>'page', CASE WHEN event_name LIKE 'Page\_Load: %' THEN substr(event_name, 12) END, ''),
+        COUNT(*),
+        COUNT(*) FILTER (WHERE category = 'ERROR'),
+        COUNT(*) FILTER (WHERE category = 'PERFORMANCE'),
+        COALESCE(SUM(value) FILTER (WHERE category = 'PERFORMANCE'), 0),
+        telemetry_latency_hist(
+            array_agg(width_bucket(value, telemetry_latency_bounds())) FILTER (WHERE category = 'PERFORMANCE')
+        )
+    FROM system_metrics
+    WHERE timestamp >= since
+    GROUP BY 1, 2, 3, 4;
+    GET DIAGNOSTICS rebuilt = ROW_COUNT;
+    RETURN rebuilt;
+END;
+$$ LANGUAGE plpgsql;
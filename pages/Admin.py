@@ -1,113 +1,264 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-from database import fetch_query
-from utils import render_sidebar
-from services.observability import Telemetry
+from database import fetch_query, pool_stats
+from utils import render_sidebar, ethos_observe, check_rate_limit
+from services.observability import Telemetry, LatencyHistogram, LATENCY_BOUNDS
+from services.cache import registry
+from services.querylog import query_stats
+from services.ratelimit import limiter
+from services.tracing import recent_traces, load_trace, waterfall_rows, TRACE_SAMPLE_RATE
 
 # --- 1. CONFIGURATION & AUTH GATE ---
 st.set_page_config(layout="wide", page_title="System Watch", page_icon="📡")
 ADMIN_EMAIL = "aryavvij@gmail.com" 
 
-if 'logged_in' not in st.session_state or not st.session_state.logged_in:
-    st.switch_page("Home.py")
-    st.stop()
-is_admin_email = st.session_state.get('user_email') == ADMIN_EMAIL
-is_admin_role = st.session_state.get('role') == 'admin'
-
-if not (is_admin_email or is_admin_role):
-    Telemetry.log('SECURITY', 'Unauthorized_Admin_Access', metadata={'user': st.session_state.get('user_email')})
-    st.error("RESTRICTED AREA: Administrators Only.")
-    st.stop()
-
-render_sidebar()
-
-# --- 2. HEADER ---
-st.title("🌐 System Health Observability")
-st.caption("Real-time telemetry and performance monitoring across the ETHOS ecosystem.")
-
-# --- 3. GLOBAL SYSTEM HEALTH MAP ---
-health_data = fetch_query("""
-    SELECT metadata->>'page' as page_name, 
-           COUNT(CASE WHEN category = 'ERROR' THEN 1 END) as crash_count
-    FROM system_metrics 
-    WHERE timestamp >= NOW() - INTERVAL '24 hours'
-    AND metadata->>'page' IS NOT NULL
-    GROUP BY page_name
-""", ())
-
-if health_data:
-    h_cols = st.columns(min(len(health_data), 4))
-    for idx, (p_name, p_crashes) in enumerate(health_data):
-        col_idx = idx % 4
-        status = "🔴 CRITICAL" if p_crashes > 0 else "🟢 STABLE"
-        h_cols[col_idx].metric(p_name.upper(), status, delta=f"{p_crashes} failures", delta_color="inverse")
-else:
-    st.info("Waiting for page telemetry...")
-
-st.markdown("---")
-
-# --- 4. KEY PERFORMANCE INDICATORS (KPIs) ---
-stats = fetch_query("""
-    SELECT 
-        AVG(CASE WHEN category = 'PERFORMANCE' THEN value END) as avg_lat,
-        COUNT(CASE WHEN category = 'ERROR' THEN 1 END) as err_count,
-        COUNT(CASE WHEN category = 'SECURITY' THEN 1 END) as sec_alerts,
-        COUNT(CASE WHEN category = 'AUTH' AND event_name = 'Login_Success' THEN 1 END) as logins
-    FROM system_metrics 
-    WHERE timestamp >= NOW() - INTERVAL '24 hours'
-""", ())
-
-s = stats[0] if stats else (0, 0, 0, 0)
-kpi1, kpi2, kpi3, kpi4 = st.columns(4)
-
-kpi1.metric("Avg Latency", f"{s[0]*1000:.0f}ms" if s[0] else "0ms", delta="Target <200ms")
-kpi2.metric("System Errors (24h)", s[1], delta="Critical" if s[1] > 0 else "Clean", delta_color="inverse")
-kpi3.metric("Security Alerts", s[2], delta="Threats Blocked" if s[2] > 0 else "Secure", delta_color="inverse")
-kpi4.metric("Active Sessions", s[3])
-
-# --- 5. PERFORMANCE TRACING ---
-st.subheader("Latency Distribution")
-latency_data = fetch_query("""
-    SELECT timestamp, event_name, value 
-    FROM system_metrics 
-    WHERE category = 'PERFORMANCE' 
-    ORDER BY timestamp DESC LIMIT 100
-""", ())
-
-if latency_data:
-    df_lat = pd.DataFrame(latency_data, columns=["Time", "Event", "Seconds"])
-    fig_lat = px.line(df_lat, x="Time", y="Seconds", color="Event", 
-                     template="plotly_dark", color_discrete_sequence=px.colors.qualitative.Pastel)
-    fig_lat.update_layout(height=350, margin=dict(l=0, r=0, t=10, b=0), 
-                          legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1))
-    st.plotly_chart(fig_lat, use_container_width=True)
-else:
-    st.info("No performance data logged yet.")
-
-# --- 6. SYSTEM LOGS (The Event Feed) ---
-st.subheader("Live Event Feed")
-log_data = fetch_query("""
-    SELECT timestamp, category, event_name, user_email, metadata 
-    FROM system_metrics 
-    ORDER BY timestamp DESC LIMIT 50
-""", ())
-
-if log_data:
-    df_logs = pd.DataFrame(log_data, columns=["Timestamp", "Category", "Event", "User", "Details"])
-    
-    def color_category(val):
-        colors = {
-            'ERROR': 'background-color: rgba(255, 75, 75, 0.1); color: #ff4b4b;', 
-            'SECURITY': 'background-color: rgba(255, 170, 0, 0.1); color: #ffaa00;', 
-            'AUTH': 'background-color: rgba(118, 179, 114, 0.1); color: #76b372;'
-        }
-        return colors.get(val, 'color: white')
-
-    st.dataframe(
-        df_logs.style.applymap(color_category, subset=['Category']),
-        use_container_width=True,
-        hide_index=True
-    )
-else:
-    st.caption("Listening for system heartbeats...")
+@ethos_observe("Admin")
+def show_admin_page():
+    if 'logged_in' not in st.session_state or not st.session_state.logged_in:
+        st.switch_page("Home.py")
+        st.stop()
+    is_admin_email = st.session_state.get('user_email') == ADMIN_EMAIL
+    is_admin_role = st.session_state.get('role') == 'admin'
+
+    if not (is_admin_email or is_admin_role):
+        Telemetry.log('SECURITY', 'Unauthorized_Admin_Access', metadata={'user': st.session_state.get('user_email')})
+        st.error("RESTRICTED AREA: Administrators Only.")
+        st.stop()
+
+    render_sidebar()
+
+    # Every widget change reruns all the aggregates below
+    if not check_rate_limit("admin_read"):
+        st.stop()
+
+    def load_latency_histograms(hours):
+        """Merged PERFORMANCE histogram per page over the last `hours`, summed bucket-wise in SQL."""
+        rows = fetch_query("""
+            SELECT page, array_agg(n ORDER BY idx) FROM (
+                SELECT r.page, b.idx, SUM(b.n)::int AS n
+                FROM telemetry_rollup_minute r, unnest(r.latency_hist) WITH ORDINALITY AS b(n, idx)
+                WHERE r.category = 'PERFORMANCE' AND r.bucket_start >= NOW() - make_interval(hours => %s)
+                GROUP BY r.page, b.idx
+            ) s
+            GROUP BY page
+        """, (hours,))
+        return {page: LatencyHistogram(counts) for page, counts in rows}
+
+    def fmt_ms(seconds):
+        return f"{seconds*1000:.0f}ms" if seconds is not None else "-"
+
+    # --- 2. HEADER ---
+    st.title("🌐 System Health Observability")
+    st.caption("Real-time telemetry and performance monitoring across the ETHOS ecosystem.")
+
+    # --- 3. GLOBAL SYSTEM HEALTH MAP ---
+    # Reads the per-minute rollup the telemetry writer maintains, not raw system_metrics
+    health_data = fetch_query("""
+        SELECT page, SUM(error_count) as crash_count
+        FROM telemetry_rollup_minute
+        WHERE bucket_start >= NOW() - INTERVAL '24 hours'
+        AND page <> ''
+        GROUP BY page
+        ORDER BY page
+    """, ())
+
+    if health_data:
+        h_cols = st.columns(min(len(health_data), 4))
+        for idx, (p_name, p_crashes) in enumerate(health_data):
+            col_idx = idx % 4
+            status = "🔴 CRITICAL" if p_crashes > 0 else "🟢 STABLE"
+            h_cols[col_idx].metric(p_name.upper(), status, delta=f"{p_crashes} failures", delta_color="inverse")
+    else:
+        st.info("Waiting for page telemetry...")
+
+    st.markdown("---")
+
+    # --- 4. KEY PERFORMANCE INDICATORS (KPIs) ---
+    stats = fetch_query("""
+        SELECT 
+            SUM(latency_sum) / NULLIF(SUM(latency_count), 0) as avg_lat,
+            COALESCE(SUM(error_count), 0) as err_count,
+            COALESCE(SUM(event_count) FILTER (WHERE category = 'SECURITY'), 0) as sec_alerts,
+            COALESCE(SUM(event_count) FILTER (WHERE category = 'AUTH' AND event_name = 'Login_Success'), 0) as logins
+        FROM telemetry_rollup_minute
+        WHERE bucket_start >= NOW() - INTERVAL '24 hours'
+    """, ())
+
+    s = stats[0] if stats else (0, 0, 0, 0)
+    kpi1, kpi2, kpi3, kpi4 = st.columns(4)
+
+    day_hists = load_latency_histograms(24)
+    overall = LatencyHistogram()
+    for h in day_hists.values():
+        overall.merge(h)
+
+    kpi1.metric("p95 Latency (24h)", fmt_ms(overall.percentile(95)),
+                delta=f"avg {fmt_ms(s[0])} | target <200ms", delta_color="off")
+    kpi2.metric("System Errors (24h)", s[1], delta="Critical" if s[1] > 0 else "Clean", delta_color="inverse")
+    kpi3.metric("Security Alerts", s[2], delta="Threats Blocked" if s[2] > 0 else "Secure", delta_color="inverse")
+    kpi4.metric("Active Sessions", s[3])
+
+    sink = Telemetry.stats()
+    st.caption(f"Telemetry sink: {sink['queued']} queued | {sink['flushed']} flushed | {sink['dropped']} dropped | {sink['failed']} failed ({sink['policy']} on overflow)")
+
+    pool = pool_stats()
+    if pool:
+        p1, p2, p3, p4 = st.columns(4)
+        p1.metric("Pool In Use", f"{pool['in_use']}/{pool['max']}")
+        p2.metric("Waiting for Connection", pool['waiting'], delta=f"{pool['timeouts']} timeouts", delta_color="inverse")
+        p3.metric("Avg Checkout Wait", f"{pool['avg_wait_ms']:.1f}ms", delta=f"max {pool['max_wait_ms']:.0f}ms", delta_color="off")
+        p4.metric("Broken Conns Replaced", pool['replaced'])
+
+    cache_stats = registry.stats()
+    if cache_stats:
+        df_cache = pd.DataFrame([
+            {"Domain": d, "Hits": c["hits"], "Misses": c["misses"], "Hit Rate": f"{c['hit_rate']:.0%}",
+             "Entries": c["entries"], "Invalidations": c["invalidations"]}
+            for d, c in sorted(cache_stats.items())
+        ])
+        st.caption("Service cache (this process)")
+        st.dataframe(df_cache, use_container_width=True, hide_index=True)
+
+    limits = limiter.stats()
+    if limits:
+        df_limits = pd.DataFrame([
+            {"Action": a, "Allowed": c["allowed"], "Throttled": c["throttled"], "Active Buckets": c["tracked"]}
+            for a, c in sorted(limits.items())
+        ])
+        st.caption("Rate limiter (this process)")
+        st.dataframe(df_limits, use_container_width=True, hide_index=True)
+
+    # --- 4b. QUERY PROFILE ---
+    st.subheader("Query Profile")
+    sort_by = st.radio("Rank fingerprints by", ["Total time", "Calls", "p95"], horizontal=True)
+    top_queries = query_stats.top(by={"Total time": "total_s", "Calls": "calls", "p95": "p95_s"}[sort_by])
+
+    if top_queries:
+        df_q = pd.DataFrame([
+            {"Fingerprint": q["fingerprint"], "Calls": q["calls"], "Total": fmt_ms(q["total_s"]),
+             "Avg": fmt_ms(q["avg_s"]), "p95": fmt_ms(q["p95_s"]), "Rows": q["rows"], "Errors": q["errors"]}
+            for q in top_queries
+        ])
+        st.caption("fetch_query / execute_query fingerprints (this process)")
+        st.dataframe(df_q, use_container_width=True, hide_index=True)
+    else:
+        st.caption("No queries recorded in this process yet.")
+
+    slow = query_stats.slow_log()
+    if slow:
+        df_slow = pd.DataFrame([
+            {"At": pd.Timestamp(q["at"], unit="s"), "ms": round(q["ms"]), "Rows": q["rows"],
+             "Failed": q["failed"], "Fingerprint": q["fingerprint"]}
+            for q in slow
+        ])
+        st.caption(f"Slow-query log (>= {query_stats.slow_ms:.0f}ms)")
+        st.dataframe(df_slow, use_container_width=True, hide_index=True)
+
+    offenders = query_stats.n_plus_one()
+    if offenders:
+        df_n1 = pd.DataFrame([
+            {"Page": o["page"], "Wasted Round-Trips": o["wasted"], "Flagged Runs": o["runs"],
+             "Worst Run": f"{o['worst']} calls", "Last Seen": pd.Timestamp(o["last_seen"], unit="s"),
+             "Fingerprint": o["fingerprint"]}
+            for o in offenders
+        ])
+        st.caption(f"N+1 offenders: same statement >= {query_stats.n_plus_one_at}x in one page run (this process)")
+        st.dataframe(df_n1, use_container_width=True, hide_index=True)
+
+    # --- 5. PERFORMANCE TRACING ---
+    st.subheader("Latency Distribution")
+    latency_data = fetch_query("""
+        SELECT bucket_start, event_name, latency_sum / latency_count
+        FROM telemetry_rollup_minute
+        WHERE category = 'PERFORMANCE' AND latency_count > 0
+        AND bucket_start >= NOW() - INTERVAL '6 hours'
+        ORDER BY bucket_start
+    """, ())
+
+    if latency_data:
+        df_lat = pd.DataFrame(latency_data, columns=["Time", "Event", "Seconds"])
+        fig_lat = px.line(df_lat, x="Time", y="Seconds", color="Event", 
+                         template="plotly_dark", color_discrete_sequence=px.colors.qualitative.Pastel)
+        fig_lat.update_layout(height=350, margin=dict(l=0, r=0, t=10, b=0), 
+                              legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1))
+        st.plotly_chart(fig_lat, use_container_width=True)
+    else:
+        st.info("No performance data logged yet.")
+
+    st.subheader("Tail Latency by Page")
+    windows = {"Last hour": 1, "Last 24 hours": 24, "Last 7 days": 168, "Last 30 days": 720}
+    window = st.selectbox("Window", list(windows), index=1)
+    page_hists = day_hists if windows[window] == 24 else load_latency_histograms(windows[window])
+
+    if page_hists:
+        df_pct = pd.DataFrame([
+            {"Page": page or "(no page)", "Samples": h.total, "p50": fmt_ms(h.percentile(50)),
+             "p95": fmt_ms(h.percentile(95)), "p99": fmt_ms(h.percentile(99))}
+            for page, h in sorted(page_hists.items(), key=lambda kv: -(kv[1].percentile(95) or 0))
+        ])
+        st.dataframe(df_pct, use_container_width=True, hide_index=True)
+
+        merged = LatencyHistogram()
+        for h in page_hists.values():
+            merged.merge(h)
+        labels = [f"<{b*1000:.0f}ms" for b in LATENCY_BOUNDS] + [f">={LATENCY_BOUNDS[-1]:.0f}s"]
+        df_hist = pd.DataFrame([(labels[i], n) for i, n in enumerate(merged.counts) if n], columns=["Bucket", "Events"])
+        fig_hist = px.bar(df_hist, x="Bucket", y="Events", template="plotly_dark")
+        fig_hist.update_layout(height=250, margin=dict(l=0, r=0, t=10, b=0))
+        st.caption(f"Latency histogram ({window.lower()})")
+        st.plotly_chart(fig_hist, use_container_width=True)
+    else:
+        st.caption("No latency samples in this window.")
+
+    # --- 5b. TRACE WATERFALL ---
+    st.subheader("Trace Waterfall")
+    traces = recent_traces()
+    if traces:
+        picked = st.selectbox(
+            "Traced page run", traces,
+            format_func=lambda t: f"{pd.Timestamp(t['started_at'], unit='s'):%Y-%m-%d %H:%M:%S} | {t['name']} | {t['duration_ms']:.0f}ms",
+        )
+        rows = waterfall_rows(load_trace(picked["trace_id"]))
+        df_trace = pd.DataFrame([
+            {"Span": f"{'· ' * depth}{s['name']}", "Start": offset, "Duration": s["duration_ms"],
+             "Detail": s["attrs"].get("sql", "") if isinstance(s["attrs"], dict) else ""}
+            for depth, offset, s in rows
+        ])
+        fig_trace = px.bar(df_trace, x="Duration", y="Span", base="Start", orientation="h",
+                           hover_data=["Detail"], template="plotly_dark")
+        fig_trace.update_yaxes(autorange="reversed", categoryorder="array", categoryarray=df_trace["Span"].tolist())
+        fig_trace.update_layout(height=max(200, 28 * len(df_trace)), margin=dict(l=0, r=0, t=10, b=0), xaxis_title="ms")
+        st.plotly_chart(fig_trace, use_container_width=True)
+    else:
+        st.caption(f"No traced page runs yet ({TRACE_SAMPLE_RATE:.0%} of page runs are sampled; see TRACE_SAMPLE_RATE).")
+
+    # --- 6. SYSTEM LOGS (The Event Feed) ---
+    st.subheader("Live Event Feed")
+    log_data = fetch_query("""
+        SELECT timestamp, category, event_name, user_email, metadata 
+        FROM system_metrics 
+        WHERE timestamp >= NOW() - INTERVAL '7 days'
+        ORDER BY timestamp DESC LIMIT 50
+    """, ())
+
+    if log_data:
+        df_logs = pd.DataFrame(log_data, columns=["Timestamp", "Category", "Event", "User", "Details"])
+
+        def color_category(val):
+            colors = {
+                'ERROR': 'background-color: rgba(255, 75, 75, 0.1); color: #ff4b4b;', 
+                'SECURITY': 'background-color: rgba(255, 170, 0, 0.1); color: #ffaa00;', 
+                'AUTH': 'background-color: rgba(118, 179, 114, 0.1); color: #76b372;'
+            }
+            return colors.get(val, 'color: white')
+
+        st.dataframe(
+            df_logs.style.map(color_category, subset=['Category']),
+            use_container_width=True,
+            hide_index=True
+        )
+    else:
+        st.caption("Listening for system heartbeats...")
+
+show_admin_page()
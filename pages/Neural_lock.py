@@ -4,123 +4,111 @@ import pandas as pd
 import plotly.express as px
 from database import execute_query, fetch_query
 from datetime import datetime as dt, timedelta
-from utils import render_sidebar
+from utils import render_sidebar, ethos_observe, check_rate_limit
+from services.querylog import query_run
+from services.periods import month_range
+from services.logic import ActiveSessionService, FocusService, invalidate_user_caches
 
 # --- PAGE CONFIGURATION ---
 st.set_page_config(layout="wide", page_title="Neural Lock", page_icon="🔒")
 
-if 'logged_in' not in st.session_state or not st.session_state.logged_in:
-    st.switch_page("Home.py") 
-    st.stop()
-
-render_sidebar()
-
-# --- INITIALIZATION ---
-user = st.session_state.user_email
-now = dt.now()
-t_date = now.date()
-st.title("🔒 Neural Lock")
-st.caption(f"Protocol Active for {t_date.strftime('%A, %b %d, %Y')}")
-st.markdown("""
-    <style>
-    div.stButton > button[kind="primary"] {
-        background-color: #76b372 !important;
-        border-color: #76b372 !important;
-        color: white !important;
-    }
-    .timer-card {
-        text-align: center; 
-        border: 2px solid #333; 
-        padding: 40px; 
-        border-radius: 15px; 
-        background: rgba(255, 255, 255, 0.02);
-    }
-    </style>
-""", unsafe_allow_html=True)
-
-# --- 1. TOP ANALYTICS OVERVIEW BAR ---
-stats_query = fetch_query("""
-    WITH daily_totals AS (
-        SELECT session_date, SUM(duration_mins) as total_mins
-        FROM focus_sessions
-        WHERE user_email = %s
-        GROUP BY session_date
-    )
-    SELECT 
-        (SELECT COALESCE(SUM(duration_mins), 0) FROM focus_sessions 
-         WHERE user_email = %s AND session_date = CURRENT_DATE) as today,
-        (SELECT COALESCE(AVG(total_mins), 0) FROM daily_totals) as daily_avg,
-        (SELECT COALESCE(SUM(duration_mins), 0) FROM focus_sessions 
-         WHERE user_email = %s AND session_date >= DATE_TRUNC('week', CURRENT_DATE)) as week_total,
-        (SELECT COALESCE(SUM(duration_mins), 0) FROM focus_sessions 
-         WHERE user_email = %s AND session_date >= DATE_TRUNC('month', CURRENT_DATE)) as month_total
-""", (user, user, user, user))
-
-s = stats_query[0] if stats_query else (0, 0, 0, 0)
-m1, m2, m3, m4 = st.columns(4)
-
-m1.metric("Today's Focus", f"{(s[0] or 0)/60:.1f}h")
-m2.metric("Daily Average", f"{(s[1] or 0)/60:.1f}h")
-m3.metric("Weekly Total", f"{(s[2] or 0)/60:.1f}h")
-m4.metric("Monthly Total", f"{(s[3] or 0)/60:.1f}h")
-
-# --- 2. ANALYTICS ENGINE (GRAPH) ---
-c_sel1, c_sel2 = st.columns([2, 1])
-with c_sel1:
-    month_names = ["January", "February", "March", "April", "May", "June", 
-                   "July", "August", "September", "October", "November", "December"]
-    selected_month_name = st.selectbox("View History", month_names, index=now.month-1)
-    month_num = month_names.index(selected_month_name) + 1
-with c_sel2:
-    selected_year = st.selectbox("Year", [2025, 2026, 2027], index=1)
-
-monthly_raw = fetch_query("""
-    SELECT EXTRACT(DAY FROM session_date) as day, SUM(duration_mins) 
-    FROM focus_sessions 
-    WHERE user_email=%s 
-    AND EXTRACT(MONTH FROM session_date) = %s 
-    AND EXTRACT(YEAR FROM session_date) = %s
-    GROUP BY day ORDER BY day
-""", (user, month_num, selected_year))
-
-m_df = pd.DataFrame(monthly_raw, columns=["Day", "Mins"])
-m_df["Hours"] = m_df["Mins"] / 60.0
-
-if not m_df.empty:
-    fig_m = px.area(m_df, x="Day", y="Hours", color_discrete_sequence=['#76b372'], template="plotly_dark")
-    fig_m.update_layout(
-        height=220, margin=dict(l=0, r=0, t=10, b=0), 
-        paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)',
-        xaxis=dict(showgrid=False, range=[1, 31]), 
-        yaxis=dict(showgrid=True)
-    )
-    st.plotly_chart(fig_m, use_container_width=True)
-
-st.markdown("---")
-
-# --- 3. THE FRAGMENTED TIMER ENGINE ---
-@st.fragment(run_every="1s")
-def timer_fragment():
-    col_timer, col_log = st.columns([1.2, 1], gap="large")
-    active = fetch_query("SELECT task_name, start_time, is_paused, accumulated_seconds FROM active_sessions WHERE user_email=%s", (user,))
+@ethos_observe("Neural Lock")
+def show_neural_lock_page():
+    if 'logged_in' not in st.session_state or not st.session_state.logged_in:
+        st.switch_page("Home.py") 
+        st.stop()
+
+    render_sidebar()
+
+    # --- INITIALIZATION ---
+    user = st.session_state.user_email
+    now = dt.now()
+    t_date = now.date()
+    st.title("🔒 Neural Lock")
+    st.caption(f"Protocol Active for {t_date.strftime('%A, %b %d, %Y')}")
+    st.markdown("""
+        <style>
+        div.stButton > button[kind="primary"] {
+            background-color: #76b372 !important;
+            border-color: #76b372 !important;
+            color: white !important;
+        }
+        .timer-card {
+            text-align: center; 
+            border: 2px solid #333; 
+            padding: 40px; 
+            border-radius: 15px; 
+            background: rgba(255, 255, 255, 0.02);
+        }
+        </style>
+    """, unsafe_allow_html=True)
+
+    # --- 1. TOP ANALYTICS OVERVIEW BAR ---
+    s = FocusService.get_stats_overview(user)
+    m1, m2, m3, m4 = st.columns(4)
+
+    m1.metric("Today's Focus", f"{(s[0] or 0)/60:.1f}h")
+    m2.metric("Daily Average", f"{(s[1] or 0)/60:.1f}h")
+    m3.metric("Weekly Total", f"{(s[2] or 0)/60:.1f}h")
+    m4.metric("Monthly Total", f"{(s[3] or 0)/60:.1f}h")
+
+    # --- 2. ANALYTICS ENGINE (GRAPH) ---
+    c_sel1, c_sel2 = st.columns([2, 1])
+    with c_sel1:
+        month_names = ["January", "February", "March", "April", "May", "June", 
+                       "July", "August", "September", "October", "November", "December"]
+        selected_month_name = st.selectbox("View History", month_names, index=now.month-1)
+        month_num = month_names.index(selected_month_name) + 1
+    with c_sel2:
+        selected_year = st.selectbox("Year", [2025, 2026, 2027], index=1)
+
+    history_span = month_range(month_num, selected_year)
+    monthly_raw = fetch_query("""
+        SELECT EXTRACT(DAY FROM session_date) as day, SUM(duration_mins) 
+        FROM focus_sessions 
+        WHERE user_email=%s 
+        AND session_date >= %s 
+        AND session_date < %s
+        GROUP BY day ORDER BY day
+    """, (user, history_span.start, history_span.end))
+
+    m_df = pd.DataFrame(monthly_raw, columns=["Day", "Mins"])
+    m_df["Hours"] = m_df["Mins"] / 60.0
+
+    if not m_df.empty:
+        fig_m = px.area(m_df, x="Day", y="Hours", color_discrete_sequence=['#76b372'], template="plotly_dark")
+        fig_m.update_layout(
+            height=220, margin=dict(l=0, r=0, t=10, b=0), 
+            paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)',
+            xaxis=dict(showgrid=False, range=[1, 31]), 
+            yaxis=dict(showgrid=True)
+        )
+        st.plotly_chart(fig_m, use_container_width=True)
+
+    st.markdown("---")
+
+    # --- 3. THE FRAGMENTED TIMER ENGINE ---
+    @st.fragment(run_every="1s")
+    def timer_fragment():
+        # Counted apart from the page run: 1s fragment reruns would otherwise pile onto its counters
+        with query_run("Neural Lock timer"):
+            active = ActiveSessionService.current(user, st.session_state)
 
-    with col_timer:
         st.subheader("Focus Session")
         if not active:
             task_input = st.text_input("Objective", placeholder="What are you crushing?", key="new_task", label_visibility="collapsed")
             st.markdown('<div class="timer-card"><h1 style="font-size: 60px; color: #444; margin: 0;">00:00:00</h1><p style="color: #666;">READY</p></div>', unsafe_allow_html=True)
-            
-            if st.button("INITIATE STOPWATCH", use_container_width=True, type="primary"):
+
+            if st.button("INITIATE STOPWATCH", use_container_width=True, type="primary") and check_rate_limit():
                 if task_input:
-                    execute_query("INSERT INTO active_sessions (user_email, task_name, start_time, is_paused, accumulated_seconds) VALUES (%s, %s, %s, %s, %s)", 
-                                  (user, task_input, dt.now(), False, 0))
+                    ActiveSessionService.start(user, task_input)
                     st.rerun()
         else:
-            task_name, start_time, is_paused, acc_sec = active[0]
-            elapsed = acc_sec if is_paused else int((dt.now() - start_time).total_seconds()) + acc_sec
+            task_name, is_paused = active.task_name, active.is_paused
+            elapsed = active.elapsed(dt.now())
             h, rem = divmod(elapsed, 3600)
             m, s = divmod(rem, 60)
-            
+
             color = "#ffaa00" if is_paused else "#76b372"
             st.markdown(f"""
                 <div style="text-align: center; border: 2px solid {color}; padding: 40px; border-radius: 15px; background: rgba(118, 179, 114, 0.05);">
@@ -131,36 +119,41 @@ def timer_fragment():
 
             b1, b2 = st.columns(2)
             if not is_paused:
-                if b1.button("PAUSE", use_container_width=True):
-                    execute_query("UPDATE active_sessions SET is_paused=True, accumulated_seconds=%s WHERE user_email=%s", (elapsed, user))
+                if b1.button("PAUSE", use_container_width=True) and check_rate_limit():
+                    ActiveSessionService.pause(user, elapsed)
                     st.rerun()
             else:
-                if b1.button("RESUME", use_container_width=True):
-                    execute_query("UPDATE active_sessions SET is_paused=False, start_time=%s WHERE user_email=%s", (dt.now(), user))
+                if b1.button("RESUME", use_container_width=True) and check_rate_limit():
+                    ActiveSessionService.resume(user)
                     st.rerun()
 
-            if b2.button("STOP & LOG", use_container_width=True):
+            if b2.button("STOP & LOG", use_container_width=True) and check_rate_limit():
                 duration = max(1, elapsed // 60)
-                execute_query("INSERT INTO focus_sessions (user_email, task_name, duration_mins, session_date) VALUES (%s, %s, %s, CURRENT_DATE)", (user, task_name, duration))
-                execute_query("DELETE FROM active_sessions WHERE user_email=%s", (user,))
+                ActiveSessionService.stop(user, task_name, duration)
                 st.rerun()
 
+    # --- 4. FOCUS LOGS (outside the 1s fragment) ---
+    col_timer, col_log = st.columns([1.2, 1], gap="large")
+    with col_timer:
+        timer_fragment()
+
     with col_log:
         st.subheader("Focus Logs")
-        
+
         # --- DROPDOWN FOR MANAGEMENT ---
         with st.expander("MANUAL SESSION OVERRIDE", expanded=False):
             manage_date = st.date_input("Target Date", dt.now().date(), key="manage_date")
             day_sessions = fetch_query("SELECT id, task_name, duration_mins FROM focus_sessions WHERE user_email=%s AND session_date = %s ORDER BY id DESC", (user, manage_date))
-            
+
             action = st.selectbox("Action", ["Add Manual Session", "Edit Session", "Delete Session"], index=0)
-            
+
             if action == "Add Manual Session":
                 c1, c2 = st.columns(2)
                 m_task = c1.text_input("Objective", placeholder="Retroactive Log")
                 m_duration = c2.number_input("Minutes", min_value=1, step=1, value=25)
-                if st.button("MANUAL LOG", use_container_width=True, type="primary"):
+                if st.button("MANUAL LOG", use_container_width=True, type="primary") and check_rate_limit():
                     execute_query("INSERT INTO focus_sessions (user_email, task_name, duration_mins, session_date) VALUES (%s, %s, %s, %s)", (user, m_task, m_duration, manage_date))
+                    invalidate_user_caches(user, "focus")
                     st.rerun()
 
             elif action == "Edit Session" and day_sessions:
@@ -168,28 +161,30 @@ def timer_fragment():
                 selected_label = st.selectbox("Select Session to Edit", list(session_map.keys()))
                 session_id = session_map[selected_label]
                 current_row = [r for r in day_sessions if r[0] == session_id][0]
-                
+
                 c1, c2 = st.columns(2)
                 edit_task = c1.text_input("Edit Objective", value=current_row[1])
                 edit_mins = c2.number_input("Edit Minutes", value=int(current_row[2]))
-                if st.button("SAVE CHANGES", use_container_width=True, type="primary"):
+                if st.button("SAVE CHANGES", use_container_width=True, type="primary") and check_rate_limit():
                     execute_query("UPDATE focus_sessions SET task_name=%s, duration_mins=%s WHERE id=%s", (edit_task, edit_mins, session_id))
+                    invalidate_user_caches(user, "focus")
                     st.rerun()
 
             elif action == "Delete Session" and day_sessions:
                 session_map = {f"{row[1]} ({row[2]}m)": row[0] for row in day_sessions}
                 selected_label = st.selectbox("Select Session to Delete", list(session_map.keys()))
-                if st.button("CONFIRM DELETE", use_container_width=True, type="primary"):
+                if st.button("CONFIRM DELETE", use_container_width=True, type="primary") and check_rate_limit():
                     execute_query("DELETE FROM focus_sessions WHERE id=%s", (session_map[selected_label],))
+                    invalidate_user_caches(user, "focus")
                     st.rerun()
-            
+
             if not day_sessions and action != "Add Manual Session":
                 st.caption("No records to edit/delete for this date.")
 
         # --- PERSISTENT LOG TABLE ---
         log_date_view = st.date_input("View Logs For", dt.now().date(), key="view_date")
         view_data = fetch_query("SELECT task_name, duration_mins FROM focus_sessions WHERE user_email=%s AND session_date = %s ORDER BY id DESC", (user, log_date_view))
-        
+
         if view_data:
             log_df = pd.DataFrame(view_data, columns=["Objective", "Duration"])
             log_df["Spent"] = log_df["Duration"].apply(lambda m: f"{m//60}h {m%60}m" if m>=60 else f"{m}m")
@@ -197,4 +192,4 @@ def timer_fragment():
         else:
             st.caption(f"No logs found for {log_date_view}")
 
-timer_fragment()
+show_neural_lock_page()
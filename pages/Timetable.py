@@ -1,147 +1,152 @@
 import streamlit as st
-from database import fetch_query, execute_query
+from database import execute_query
 from datetime import datetime, time
-from utils import render_sidebar
+from utils import render_sidebar, ethos_observe, check_rate_limit
+from services.logic import TimetableService, invalidate_user_caches
 
 # --- PAGE CONFIGURATION ---
 st.set_page_config(layout="wide", page_title="Weekly Timetable")
 
-if 'logged_in' not in st.session_state or not st.session_state.logged_in:
-    st.switch_page("Home.py") 
-    st.stop()
-
-render_sidebar()
-
-# --- INITIALIZATION ---
-user = st.session_state.user_email
-st.title("📅 Weekly Timetable")
-days = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
-
-# Custom CSS for Green Action Buttons
-st.markdown("""
-    <style>
-    div.stButton > button[kind="primary"] {
-        background-color: #76b372 !important;
-        border-color: #76b372 !important;
-        color: white !important;
-    }
-    </style>
-""", unsafe_allow_html=True)
-
-# --- TIME PICKER UTILITY ---
-def time_picker(label_prefix, default_h=8, default_m=0, default_p="AM", key_suffix=""):
-    st.write(f"**{label_prefix} Time**")
-    p1, p2, p3 = st.columns([1, 1, 1])
-    
-    display_h = default_h
-    if display_h > 12: display_h -= 12
-    if display_h == 0: display_h = 12
-    
-    h_options = [i for i in range(1, 13)]
-    m_options = [f"{i:02d}" for i in range(60)]
-    p_options = ["AM", "PM"]
-
-    h = p1.selectbox(f"H{key_suffix}", h_options, index=h_options.index(display_h), label_visibility="collapsed", key=f"h_{label_prefix}_{key_suffix}")
-    m = p2.selectbox(f"M{key_suffix}", m_options, index=default_m, label_visibility="collapsed", key=f"m_{label_prefix}_{key_suffix}")
-    p = p3.selectbox(f"P{key_suffix}", p_options, index=p_options.index(default_p), label_visibility="collapsed", key=f"p_{label_prefix}_{key_suffix}")
-    
-    h24 = int(h)
-    if p == "PM" and h24 != 12: h24 += 12
-    if p == "AM" and h24 == 12: h24 = 0
-    return time(h24, int(m))
-
-# --- SCHEDULE MANAGER ---
-with st.expander("Schedule Manager (Add, Edit, or Delete Activities)", expanded=False):
-    mode = st.radio("Action Protocol", ["Add New", "Edit Activity", "Delete Activity"], horizontal=True)
-
-    if mode == "Add New":
-        r1c1, r1c2, r1c3 = st.columns([1, 2, 1])
-        day_sel = r1c1.selectbox("Day", days, key="add_day")
-        sub_sel = r1c2.text_input("Activity", placeholder="e.g. Data Structures Lab", key="add_sub")
-        loc_sel = r1c3.text_input("Location", placeholder="e.g. AB5-201", key="add_loc")
-
-        s_time = time_picker("Start", key_suffix="add_s")
-        e_time = time_picker("End", default_h=9, key_suffix="add_e")
-
-        if st.button("SAVE TO TIMETABLE", use_container_width=True, type="primary"):
-            if sub_sel:
-                time_range_str = f"{s_time.strftime('%H:%M')}-{e_time.strftime('%H:%M')}"
-                execute_query("""
-                    INSERT INTO timetable (user_email, day_name, start_time, subject, location) 
-                    VALUES (%s, %s, %s, %s, %s)
-                """, (user, day_sel, s_time, sub_sel, f"{time_range_str}|{loc_sel}"))
-                st.rerun()
-
-    else:
-        all_activities = fetch_query("""
-            SELECT id, day_name, subject, start_time 
-            FROM timetable WHERE user_email=%s 
-            ORDER BY CASE WHEN day_name='Monday' THEN 1 WHEN day_name='Tuesday' THEN 2 
-            WHEN day_name='Wednesday' THEN 3 WHEN day_name='Thursday' THEN 4 
-            WHEN day_name='Friday' THEN 5 WHEN day_name='Saturday' THEN 6 ELSE 7 END, start_time
-        """, (user,))
-
-        if all_activities:
-            act_options = {f"{row[1]} | {row[2].upper()} ({row[3].strftime('%I:%M %p')})": row[0] for row in all_activities}
-            selected_label = st.selectbox("Search & Select Activity to Modify", options=list(act_options.keys()))
-            selected_id = act_options[selected_label]
-
-            if mode == "Delete Activity":
-                if st.button("CONFIRM DELETION", use_container_width=True, type="primary"):
-                    execute_query("DELETE FROM timetable WHERE id=%s", (selected_id,))
-                    st.rerun()
-            
-            elif mode == "Edit Activity":
-                curr = fetch_query("SELECT day_name, subject, location, start_time FROM timetable WHERE id=%s", (selected_id,))[0]
-                
-                try:
-                    time_part, curr_loc = curr[2].split('|')
-                    s_str, e_str = time_part.split('-')
-                    h24 = int(s_str.split(':')[0])
-                    m24 = int(s_str.split(':')[1])
-                    p_val = "PM" if h24 >= 12 else "AM"
-                    h12 = h24 if 0 < h24 <= 12 else (h24 - 12 if h24 > 12 else 12)
-                except:
-                    curr_loc = curr[2]
-                    h12, m24, p_val = 8, 0, "AM"
-
-                e_r1c1, e_r1c2, e_r1c3 = st.columns([1, 2, 1])
-                e_day = e_r1c1.selectbox("Update Day", days, index=days.index(curr[0]))
-                e_sub = e_r1c2.text_input("Update Activity", value=curr[1])
-                e_loc = e_r1c3.text_input("Update Location", value=curr_loc)
-
-                e_start = time_picker("Update Start", default_h=h12, default_m=m24, default_p=p_val, key_suffix="edit_s")
-                e_end = time_picker("Update End", key_suffix="edit_e")
-
-                if st.button("SAVE UPDATES", use_container_width=True, type="primary"):
-                    time_range_str = f"{e_start.strftime('%H:%M')}-{e_end.strftime('%H:%M')}"
+@ethos_observe("Timetable")
+def show_timetable_page():
+    if 'logged_in' not in st.session_state or not st.session_state.logged_in:
+        st.switch_page("Home.py") 
+        st.stop()
+
+    render_sidebar()
+
+    # --- INITIALIZATION ---
+    user = st.session_state.user_email
+    st.title("📅 Weekly Timetable")
+    days = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+    # Custom CSS for Green Action Buttons
+    st.markdown("""
+        <style>
+        div.stButton > button[kind="primary"] {
+            background-color: #76b372 !important;
+            border-color: #76b372 !important;
+            color: white !important;
+        }
+        </style>
+    """, unsafe_allow_html=True)
+
+    # --- TIME PICKER UTILITY ---
+    def time_picker(label_prefix, default_h=8, default_m=0, default_p="AM", key_suffix=""):
+        st.write(f"**{label_prefix} Time**")
+        p1, p2, p3 = st.columns([1, 1, 1])
+
+        display_h = default_h
+        if display_h > 12: display_h -= 12
+        if display_h == 0: display_h = 12
+
+        h_options = [i for i in range(1, 13)]
+        m_options = [f"{i:02d}" for i in range(60)]
+        p_options = ["AM", "PM"]
+
+        h = p1.selectbox(f"H{key_suffix}", h_options, index=h_options.index(display_h), label_visibility="collapsed", key=f"h_{label_prefix}_{key_suffix}")
+        m = p2.selectbox(f"M{key_suffix}", m_options, index=default_m, label_visibility="collapsed", key=f"m_{label_prefix}_{key_suffix}")
+        p = p3.selectbox(f"P{key_suffix}", p_options, index=p_options.index(default_p), label_visibility="collapsed", key=f"p_{label_prefix}_{key_suffix}")
+
+        h24 = int(h)
+        if p == "PM" and h24 != 12: h24 += 12
+        if p == "AM" and h24 == 12: h24 = 0
+        return time(h24, int(m))
+
+    # --- SCHEDULE MANAGER ---
+    with st.expander("Schedule Manager (Add, Edit, or Delete Activities)", expanded=False):
+        mode = st.radio("Action Protocol", ["Add New", "Edit Activity", "Delete Activity"], horizontal=True)
+
+        if mode == "Add New":
+            r1c1, r1c2, r1c3 = st.columns([1, 2, 1])
+            day_sel = r1c1.selectbox("Day", days, key="add_day")
+            sub_sel = r1c2.text_input("Activity", placeholder="e.g. Data Structures Lab", key="add_sub")
+            loc_sel = r1c3.text_input("Location", placeholder="e.g. AB5-201", key="add_loc")
+
+            s_time = time_picker("Start", key_suffix="add_s")
+            e_time = time_picker("End", default_h=9, key_suffix="add_e")
+
+            if st.button("SAVE TO TIMETABLE", use_container_width=True, type="primary") and check_rate_limit():
+                if sub_sel:
+                    time_range_str = f"{s_time.strftime('%H:%M')}-{e_time.strftime('%H:%M')}"
                     execute_query("""
-                        UPDATE timetable SET day_name=%s, subject=%s, location=%s, start_time=%s 
-                        WHERE id=%s
-                    """, (e_day, e_sub, f"{time_range_str}|{e_loc}", e_start, selected_id))
+                        INSERT INTO timetable (user_email, day_name, start_time, subject, location) 
+                        VALUES (%s, %s, %s, %s, %s)
+                    """, (user, day_sel, s_time, sub_sel, f"{time_range_str}|{loc_sel}"))
+                    invalidate_user_caches(user, "timetable")
                     st.rerun()
+
         else:
-            st.info("Timetable empty.")
-
-st.markdown("<div style='margin-bottom: 30px;'></div>", unsafe_allow_html=True)
-
-# --- WEEKLY GRID RENDERING ---
-cols = st.columns(len(days))
-for i, day in enumerate(days):
-    with cols[i]:
-        st.markdown(f"<h4 style='text-align: center; color: #76b372;'>{day[:3].upper()}</h4>", unsafe_allow_html=True)
-        day_classes = fetch_query("SELECT id, start_time, subject, location FROM timetable WHERE user_email=%s AND day_name=%s ORDER BY start_time ASC", (user, day))
-        for cid, ctime, csub, cloc_raw in day_classes:
-            with st.container(border=True):
-                try:
-                    time_part, loc = cloc_raw.split('|')
-                    s_str, e_str = time_part.split('-')
-                    display_start = datetime.strptime(s_str, "%H:%M").strftime("%I:%M %p")
-                    display_end = datetime.strptime(e_str, "%H:%M").strftime("%I:%M %p")
-                    display_time = f"{display_start} - {display_end}"
-                except:
-                    display_time = ctime.strftime('%I:%M %p')
-                    loc = cloc_raw
-                st.markdown(f"<span style='color:#76b372; font-weight:bold; font-size:12px;'>{display_time}</span>", unsafe_allow_html=True)
-                st.markdown(f"**{csub.upper()}**")
-                if loc: st.caption(f"📍 {loc}")
+            all_activities = TimetableService.all_slots(user)
+
+            if all_activities:
+                slots_by_id = {slot.id: slot for slot in all_activities}
+                act_options = {f"{slot.day_name} | {slot.subject.upper()} ({slot.start_time.strftime('%I:%M %p')})": slot.id for slot in all_activities}
+                selected_label = st.selectbox("Search & Select Activity to Modify", options=list(act_options.keys()))
+                selected_id = act_options[selected_label]
+
+                if mode == "Delete Activity":
+                    if st.button("CONFIRM DELETION", use_container_width=True, type="primary") and check_rate_limit():
+                        execute_query("DELETE FROM timetable WHERE id=%s", (selected_id,))
+                        invalidate_user_caches(user, "timetable")
+                        st.rerun()
+
+                elif mode == "Edit Activity":
+                    slot = slots_by_id[selected_id]
+                    curr = (slot.day_name, slot.subject, slot.location, slot.start_time)
+
+                    try:
+                        time_part, curr_loc = curr[2].split('|')
+                        s_str, e_str = time_part.split('-')
+                        h24 = int(s_str.split(':')[0])
+                        m24 = int(s_str.split(':')[1])
+                        p_val = "PM" if h24 >= 12 else "AM"
+                        h12 = h24 if 0 < h24 <= 12 else (h24 - 12 if h24 > 12 else 12)
+                    except:
+                        curr_loc = curr[2]
+                        h12, m24, p_val = 8, 0, "AM"
+
+                    e_r1c1, e_r1c2, e_r1c3 = st.columns([1, 2, 1])
+                    e_day = e_r1c1.selectbox("Update Day", days, index=days.index(curr[0]))
+                    e_sub = e_r1c2.text_input("Update Activity", value=curr[1])
+                    e_loc = e_r1c3.text_input("Update Location", value=curr_loc)
+
+                    e_start = time_picker("Update Start", default_h=h12, default_m=m24, default_p=p_val, key_suffix="edit_s")
+                    e_end = time_picker("Update End", key_suffix="edit_e")
+
+                    if st.button("SAVE UPDATES", use_container_width=True, type="primary") and check_rate_limit():
+                        time_range_str = f"{e_start.strftime('%H:%M')}-{e_end.strftime('%H:%M')}"
+                        execute_query("""
+                            UPDATE timetable SET day_name=%s, subject=%s, location=%s, start_time=%s 
+                            WHERE id=%s
+                        """, (e_day, e_sub, f"{time_range_str}|{e_loc}", e_start, selected_id))
+                        invalidate_user_caches(user, "timetable")
+                        st.rerun()
+            else:
+                st.info("Timetable empty.")
+
+    st.markdown("<div style='margin-bottom: 30px;'></div>", unsafe_allow_html=True)
+
+    # --- WEEKLY GRID RENDERING ---
+    week = TimetableService.week(user)
+    cols = st.columns(len(days))
+    for i, day in enumerate(days):
+        with cols[i]:
+            st.markdown(f"<h4 style='text-align: center; color: #76b372;'>{day[:3].upper()}</h4>", unsafe_allow_html=True)
+            for slot in week.get(day, []):
+                ctime, csub, cloc_raw = slot.start_time, slot.subject, slot.location
+                with st.container(border=True):
+                    try:
+                        time_part, loc = cloc_raw.split('|')
+                        s_str, e_str = time_part.split('-')
+                        display_start = datetime.strptime(s_str, "%H:%M").strftime("%I:%M %p")
+                        display_end = datetime.strptime(e_str, "%H:%M").strftime("%I:%M %p")
+                        display_time = f"{display_start} - {display_end}"
+                    except:
+                        display_time = ctime.strftime('%I:%M %p')
+                        loc = cloc_raw
+                    st.markdown(f"<span style='color:#76b372; font-weight:bold; font-size:12px;'>{display_time}</span>", unsafe_allow_html=True)
+                    st.markdown(f"**{csub.upper()}**")
+                    if loc: st.caption(f"📍 {loc}")
+
+show_timetable_page()
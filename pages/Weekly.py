@@ -1,7 +1,9 @@
 import streamlit as st
 from datetime import datetime, timedelta
-from database import execute_query, fetch_query
-from utils import render_sidebar, ethos_observe # Import the decorator
+from utils import render_sidebar, ethos_observe, check_rate_limit # Import the decorator
+from database import DatabaseError
+from services.logic import WeeklyPlannerService
+from services.tracing import span
 
 st.set_page_config(layout="wide", page_title="Weekly Planner", page_icon="🗓️")
 
@@ -32,52 +34,61 @@ def show_weekly_page():
 
     st.title("🗓️ Weekly Planner")
 
+    # One query for the whole week, grouped by day_index
+    with span("planner.load_week"):
+        week = WeeklyPlannerService.week(user, start_date)
+
+    def toggle_task(tid):
+        if check_rate_limit():
+            try:
+                WeeklyPlannerService.set_done(user, start_date, tid, st.session_state[f"chk_{tid}"])
+                return
+            except DatabaseError as e:
+                st.error(f"Task not updated: {e}")
+        st.session_state[f"chk_{tid}"] = not st.session_state[f"chk_{tid}"]
+
     # --- 2. THE CENTRALIZED TASK ARCHITECT ---
     with st.expander("TASK ARCHITECT", expanded=False):
         c1, c2 = st.columns([1, 2])
         target_day = c1.selectbox("Select Day to Manage", days)
         day_idx = days.index(target_day)
-        current_tasks = fetch_query("SELECT id, task_name FROM weekly_planner WHERE user_email=%s AND day_index=%s AND week_start=%s ORDER BY id ASC", (user, day_idx, start_date))
         
         st.markdown("---")
         task_input = st.text_input("Add New Task", key="add_input")
-        if st.button("COMMIT NEW TASK", use_container_width=True, type="primary"):
+        if st.button("COMMIT NEW TASK", use_container_width=True, type="primary") and check_rate_limit():
             if task_input:
-                execute_query("INSERT INTO weekly_planner (user_email, day_index, task_name, week_start, is_done) VALUES (%s, %s, %s, %s, False)", (user, day_idx, task_input, start_date))
+                WeeklyPlannerService.add_task(user, start_date, day_idx, task_input)
                 st.rerun()
 
     # --- 3. THE 7-DAY GRID ---
-    cols = st.columns(7, gap="small")
-    for i, day_name in enumerate(days):
-        this_date = start_date + timedelta(days=i)
-        day_tasks = fetch_query("SELECT id, task_name, is_done FROM weekly_planner WHERE user_email=%s AND day_index=%s AND week_start=%s ORDER BY id ASC", (user, i, start_date))
+    with span("render.week_grid"):
+        cols = st.columns(7, gap="small")
+        for i, day_name in enumerate(days):
+            this_date = start_date + timedelta(days=i)
+            day_tasks = week.get(i, [])
         
-        total = len(day_tasks)
-        done = sum(1 for t in day_tasks if t[2])
-        pct = int((done / total * 100)) if total > 0 else 0
+            total = len(day_tasks)
+            done = sum(1 for t in day_tasks if t.is_done)
+            pct = int((done / total * 100)) if total > 0 else 0
         
-        with cols[i]:
-            st.markdown(f'<div class="day-header"><strong>{day_name[:3].upper()}</strong><br><small>{this_date.strftime("%d %b")}</small></div>', unsafe_allow_html=True)
+            with cols[i]:
+                st.markdown(f'<div class="day-header"><strong>{day_name[:3].upper()}</strong><br><small>{this_date.strftime("%d %b")}</small></div>', unsafe_allow_html=True)
             
-            # Progress Circle
-            st.markdown(f'''<div class="progress-wrapper"><svg viewBox="0 0 36 36" class="circular-chart">
-                <path class="circle-bg" d="M18 2.0845 a 15.9155 15.9155 0 0 1 0 31.831 a 15.9155 15.9155 0 0 1 0 -31.831"/>
-                <path class="circle" stroke-dasharray="{pct}, 100" d="M18 2.0845 a 15.9155 15.9155 0 0 1 0 31.831 a 15.9155 15.9155 0 0 1 0 -31.831"/>
-                <text x="18" y="20.5" style="fill:#76b372; font-size:10px; text-anchor:middle; font-weight:bold;">{pct}%</text></svg></div>''', unsafe_allow_html=True)
+                # Progress Circle
+                st.markdown(f'''<div class="progress-wrapper"><svg viewBox="0 0 36 36" class="circular-chart">
+                    <path class="circle-bg" d="M18 2.0845 a 15.9155 15.9155 0 0 1 0 31.831 a 15.9155 15.9155 0 0 1 0 -31.831"/>
+                    <path class="circle" stroke-dasharray="{pct}, 100" d="M18 2.0845 a 15.9155 15.9155 0 0 1 0 31.831 a 15.9155 15.9155 0 0 1 0 -31.831"/>
+                    <text x="18" y="20.5" style="fill:#76b372; font-size:10px; text-anchor:middle; font-weight:bold;">{pct}%</text></svg></div>''', unsafe_allow_html=True)
             
-            for tid, tname, tdone in day_tasks:
-                with st.container(border=True):
-                    t_c1, t_c2 = st.columns([0.25, 0.75], vertical_alignment="center")
-                    with t_c1:
-                        if st.checkbox("", value=tdone, key=f"chk_{tid}", label_visibility="collapsed"):
-                            if not tdone:
-                                execute_query("UPDATE weekly_planner SET is_done=True WHERE id=%s", (tid,))
-                                st.rerun()
-                        elif tdone:
-                            execute_query("UPDATE weekly_planner SET is_done=False WHERE id=%s", (tid,))
-                            st.rerun()
-                    with t_c2:
-                        st.markdown(f'<div class="task-text">{tname.upper()}</div>', unsafe_allow_html=True)
+                for task in day_tasks:
+                    with st.container(border=True):
+                        t_c1, t_c2 = st.columns([0.25, 0.75], vertical_alignment="center")
+                        with t_c1:
+                            # The callback patches the cached week before the rerun, so no re-query
+                            st.checkbox("", value=task.is_done, key=f"chk_{task.id}", label_visibility="collapsed",
+                                        on_change=toggle_task, args=(task.id,))
+                        with t_c2:
+                            st.markdown(f'<div class="task-text">{task.task_name.upper()}</div>', unsafe_allow_html=True)
 
 # --- EXECUTE ---
 show_weekly_page()
@@ -0,0 +1,119 @@
+import time
+import functools
+import threading
+from collections import OrderedDict
+
+class CacheRegistry:
+    """Process-wide keyed cache whose entries are tagged by user and domain.
+
+    Writes invalidate only the (user, domain) tags they affect instead of
+    clearing every cached result in the process. Hits and misses are counted
+    per domain so the Admin page can show whether caching is paying off.
+    Values are shared across sessions, so callers must treat them as read-only
+    unless they are deliberately patching an entry after a write.
+
+    The registry is bounded: set() sweeps expired entries (at most once per
+    `sweep_interval` seconds) and then evicts least-recently-used entries past
+    `max_entries`, so date/week/month keys cannot pile up in a long-lived process.
+    """
+
+    def __init__(self, max_entries=2048, sweep_interval=30.0):
+        self.max_entries = max_entries
+        self.sweep_interval = sweep_interval
+        self._data = OrderedDict()
+        self._tags = {}
+        self._stats = {}
+        self._next_sweep = 0.0
+        self._lock = threading.Lock()
+
+    def _counter(self, domain):
+        return self._stats.setdefault(domain, {"hits": 0, "misses": 0, "invalidations": 0})
+
+    def _drop(self, key):
+        entry = self._data.pop(key, None)
+        if entry is None:
+            return
+        _, _, user, domains = entry
+        for domain in domains:
+            keys = self._tags.get((user, domain))
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[(user, domain)]
+
+    def _evict(self, now):
+        if now >= self._next_sweep:
+            self._next_sweep = now + self.sweep_interval
+            for key in [k for k, entry in self._data.items() if entry[0] < now]:
+                self._drop(key)
+        while len(self._data) > self.max_entries:
+            self._drop(next(iter(self._data)))
+
+    def get(self, key, domain=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                self._drop(key)
+                entry = None
+            elif entry is not None:
+                self._data.move_to_end(key)
+            if domain is not None:
+                self._counter(domain)["hits" if entry is not None else "misses"] += 1
+            return entry[1] if entry is not None else None
+
+    def set(self, key, value, user, domains, ttl=300):
+        now = time.monotonic()
+        with self._lock:
+            self._drop(key)
+            self._data[key] = (now + ttl, value, user, tuple(domains))
+            for domain in domains:
+                self._tags.setdefault((user, domain), set()).add(key)
+            self._evict(now)
+        return value
+
+    def get_or_load(self, key, loader, user, domains, ttl=300):
+        value = self.get(key, domain=domains[0])
+        if value is None:
+            value = self.set(key, loader(), user, domains, ttl)
+        return value
+
+    def invalidate(self, user, *domains):
+        """Drop the user's entries tagged with any of `domains` (all of them if none given)."""
+        with self._lock:
+            if not domains:
+                domains = tuple({d for (u, d) in self._tags if u == user})
+            for domain in domains:
+                keys = self._tags.pop((user, domain), set())
+                for key in list(keys):
+                    self._drop(key)
+                self._counter(domain)["invalidations"] += 1
+
+    def stats(self):
+        with self._lock:
+            entries = {}
+            for _, _, _, domains in self._data.values():
+                entries[domains[0]] = entries.get(domains[0], 0) + 1
+            report = {}
+            for domain, c in self._stats.items():
+                lookups = c["hits"] + c["misses"]
+                report[domain] = dict(c, entries=entries.get(domain, 0),
+                                      hit_rate=(c["hits"] / lookups) if lookups else 0.0)
+            return report
+
+registry = CacheRegistry()
+
+def cached(*domains, ttl=300):
+    """Cache a `fn(user_email, *args)` service call in the registry under `domains`.
+
+    The first domain is the one hits/misses are counted against; the others
+    are extra tags, e.g. the dashboard snapshot is also dropped by a finance write.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(user_email, *args):
+            key = (func.__qualname__, user_email) + args
+            return registry.get_or_load(key, lambda: func(user_email, *args), user_email, domains, ttl)
+        # Uncounted lookup of the current entry, for patching it in place after a write
+        wrapper.peek = lambda user_email, *args: registry.get((func.__qualname__, user_email) + args)
+        return wrapper
+    return decorator
@@ -1,10 +1,14 @@
 from pydantic import BaseModel
-from datetime import datetime as dt
-from typing import List, Tuple
-import streamlit as st
+from datetime import datetime as dt, date, time, timedelta
+from typing import List, Optional, Tuple
+import os
+import math
+import select
+import threading
+import time as clock
 import calendar
-from utils import check_rate_limit 
-from services.observability import Telemetry 
+from services.cache import registry, cached
+from services.periods import month_range, period_range, this_month
 
 # --- 1. SCHEMAS ---
 class FocusSession(BaseModel):
@@ -15,29 +19,70 @@ class FinanceSummary(BaseModel):
     remaining_budget: float = 0.0
     net_debt: float = 0.0
 
+class PlannerTask(BaseModel):
+    task_name: str
+    is_done: bool = False
+
+class TimetableSlot(BaseModel):
+    id: int
+    day_name: str
+    start_time: time
+    subject: str
+    location: str = ""
+
+class BlueprintItem(BaseModel):
+    task_description: str
+    progress: float = 0.0
+
+class UpcomingEvent(BaseModel):
+    description: str
+    event_date: date
+
+class ActiveSession(BaseModel):
+    task_name: str
+    start_time: dt
+    is_paused: bool = False
+    accumulated_seconds: int = 0
+
+    def elapsed(self, now: dt) -> int:
+        if self.is_paused:
+            return self.accumulated_seconds
+        return int((now - self.start_time).total_seconds()) + self.accumulated_seconds
+
+class WeeklyTask(BaseModel):
+    id: int
+    task_name: str
+    is_done: bool = False
+
+class CalendarEvent(BaseModel):
+    description: str
+    is_done: bool = False
+    is_recurring: bool = False
+
+class DashboardSnapshot(BaseModel):
+    tasks: List[PlannerTask] = []
+    blueprint: List[BlueprintItem] = []
+    finance: FinanceSummary = FinanceSummary()
+    focus_logs: List[FocusSession] = []
+    events: List[UpcomingEvent] = []
+
 # --- 2. FINANCE SERVICE ---
 class FinanceService:
     @staticmethod
-    @st.cache_data(ttl=300)
+    @cached("finance", ttl=300)
     def get_dashboard_metrics(user_email: str, period: str):
         from database import fetch_query 
-        
-        if not check_rate_limit(limit=20, window=60):
-            return FinanceSummary(remaining_budget=0.0, net_debt=0.0)
 
         try:
-            p_parts = period.split()
-            m_num = list(calendar.month_name).index(p_parts[0])
-            y_num = int(p_parts[1])
+            span = period_range(period)
             
             query = """
                 SELECT 
                     (SELECT COALESCE(SUM(plan), 0) FROM finances WHERE user_email=%s AND period=%s) - 
-                    (SELECT COALESCE(SUM(amount), 0) FROM expense_logs 
-                     WHERE user_email=%s AND EXTRACT(MONTH FROM expense_date) = %s 
-                     AND EXTRACT(YEAR FROM expense_date) = %s)
+                    (SELECT COALESCE(SUM(total_amount), 0) FROM expense_monthly_rollup 
+                     WHERE user_email=%s AND month = %s)
             """
-            res = fetch_query(query, (user_email, period, user_email, m_num, y_num))
+            res = fetch_query(query, (user_email, period, user_email, span.start))
             debt_res = fetch_query("SELECT SUM(amount - paid_out) FROM debt WHERE user_email=%s", (user_email,))
             
             return FinanceSummary(
@@ -47,10 +92,39 @@ class FinanceService:
         except Exception:
             return FinanceSummary(remaining_budget=0.0, net_debt=0.0)
 
+    @staticmethod
+    @cached("finance", ttl=300)
+    def get_budget_vs_actual(user_email: str, period: str) -> List[Tuple[str, float, float]]:
+        """(category, planned, actual) rows: one indexed join against the monthly spend rollup."""
+        from database import fetch_query
+
+        return fetch_query("""
+            SELECT f.category, f.plan, COALESCE(r.total_amount, 0) as actual_total
+            FROM finances f
+            LEFT JOIN expense_monthly_rollup r
+                ON r.user_email = f.user_email AND r.month = %s AND r.category = f.category
+            WHERE f.user_email = %s AND f.period = %s
+            GROUP BY f.category, f.plan, r.total_amount
+        """, (period_range(period).start, user_email, period))
+
+    @staticmethod
+    @cached("finance", ttl=600)
+    def get_spend_trend(user_email: str, months: int = 12) -> List[Tuple[date, str, float]]:
+        """(month, category, spent) for the last `months` months, from at most months x categories rollup rows."""
+        from database import fetch_query
+
+        start = this_month().start
+        for _ in range(months - 1):
+            start = (start - timedelta(days=1)).replace(day=1)
+        return fetch_query("""
+            SELECT month, category, total_amount FROM expense_monthly_rollup
+            WHERE user_email = %s AND month >= %s ORDER BY month ASC, category ASC
+        """, (user_email, start))
+
 # --- 3. FOCUS SERVICE ---
 class FocusService:
     @staticmethod
-    @st.cache_data(ttl=600)
+    @cached("focus", ttl=600)
     def get_daily_logs(user_email: str, date) -> List[FocusSession]:
         from database import fetch_query 
         
@@ -59,24 +133,450 @@ class FocusService:
         return [FocusSession(task_name=row[0], duration_mins=row[1]) for row in raw_data]
 
     @staticmethod
-    @st.cache_data(ttl=600)
-    def get_stats_overview(user_email: str) -> Tuple[int, int, float, float]:
+    @cached("focus", ttl=600)
+    def get_stats_overview(user_email: str) -> Tuple[int, float, int, int]:
+        """(today, daily average, week, month) minutes from the trigger-maintained rollups.
+
+        Reads at most one lifetime row and 31 day rows, however long the history is.
+        """
         from database import fetch_query 
         
         query = """
-            WITH daily_totals AS (
-                SELECT session_date, SUM(duration_mins) as total_mins
-                FROM focus_sessions WHERE user_email = %s GROUP BY session_date
-            )
             SELECT 
-                (SELECT COALESCE(SUM(duration_mins), 0) FROM focus_sessions WHERE user_email = %s AND session_date = CURRENT_DATE),
-                (SELECT COALESCE(AVG(total_mins), 0) FROM daily_totals),
-                (SELECT COALESCE(SUM(duration_mins), 0) FROM focus_sessions WHERE user_email = %s AND session_date >= DATE_TRUNC('week', CURRENT_DATE)),
-                (SELECT COALESCE(SUM(duration_mins), 0) FROM focus_sessions WHERE user_email = %s AND session_date >= DATE_TRUNC('month', CURRENT_DATE))
+                COALESCE((SELECT total_mins FROM focus_daily_rollup WHERE user_email = %(user)s AND session_date = CURRENT_DATE), 0),
+                COALESCE((SELECT total_mins::float / NULLIF(active_days, 0) FROM focus_lifetime_rollup WHERE user_email = %(user)s), 0),
+                (SELECT COALESCE(SUM(total_mins), 0) FROM focus_daily_rollup WHERE user_email = %(user)s AND session_date >= DATE_TRUNC('week', CURRENT_DATE)),
+                (SELECT COALESCE(SUM(total_mins), 0) FROM focus_daily_rollup WHERE user_email = %(user)s AND session_date >= DATE_TRUNC('month', CURRENT_DATE))
         """
-        res = fetch_query(query, (user_email, user_email, user_email, user_email))
+        res = fetch_query(query, {"user": user_email})
         return res[0] if res else (0, 0, 0, 0)
 
-# --- 4. CACHE INVALIDATOR ---
-def invalidate_user_caches():
-    st.cache_data.clear()
+# --- 4. DASHBOARD SERVICE ---
+class DashboardService:
+    """Every Home card in one statement: each card is a json_agg sub-select."""
+
+    SNAPSHOT_QUERY = """
+        SELECT
+            (SELECT COALESCE(json_agg(t), '[]') FROM (
+                SELECT task_name, is_done FROM weekly_planner
+                WHERE user_email=%(user)s AND day_index=%(day_index)s AND week_start=%(week_start)s LIMIT 5) t),
+            (SELECT COALESCE(json_agg(t), '[]') FROM (
+                SELECT task_description, progress FROM future_tasks
+                WHERE user_email=%(user)s AND progress < 100 ORDER BY progress DESC LIMIT 4) t),
+            (SELECT COALESCE(SUM(plan), 0) FROM finances WHERE user_email=%(user)s AND period=%(period)s) -
+            (SELECT COALESCE(SUM(total_amount), 0) FROM expense_monthly_rollup
+                WHERE user_email=%(user)s AND month = %(month_start)s),
+            (SELECT COALESCE(SUM(amount - paid_out), 0) FROM debt WHERE user_email=%(user)s),
+            (SELECT COALESCE(json_agg(t), '[]') FROM (
+                SELECT task_name, duration_mins FROM focus_sessions
+                WHERE user_email=%(user)s AND session_date=%(today)s) t),
+            (SELECT COALESCE(json_agg(t), '[]') FROM (
+                SELECT description, event_date FROM events
+                WHERE user_email=%(user)s AND event_date >= %(today)s ORDER BY event_date ASC LIMIT 5) t)
+    """
+
+    @staticmethod
+    def fetch_snapshot(user_email: str, today: date) -> DashboardSnapshot:
+        """Uncached loader; one round-trip regardless of how many cards there are."""
+        from database import fetch_query
+
+        month = this_month(today)
+        params = {
+            "user": user_email, "today": today,
+            "day_index": today.weekday(), "week_start": today - timedelta(days=today.weekday()),
+            "period": today.strftime("%B %Y"),
+            "month_start": month.start,
+        }
+        res = fetch_query(DashboardService.SNAPSHOT_QUERY, params)
+        if not res:
+            return DashboardSnapshot()
+
+        tasks, blueprint, remaining, debt, focus, events = res[0]
+        return DashboardSnapshot(
+            tasks=tasks, blueprint=blueprint,
+            finance=FinanceSummary(remaining_budget=remaining or 0.0, net_debt=debt or 0.0),
+            focus_logs=focus, events=events,
+        )
+
+    @staticmethod
+    @cached("dashboard", "finance", "focus", "planner", "calendar", "blueprint", ttl=60)
+    def get_snapshot(user_email: str, today: date) -> DashboardSnapshot:
+        return DashboardService.fetch_snapshot(user_email, today)
+
+# --- 5. HABIT SERVICE ---
+class HabitService:
+    """Diff-based sync for the month grid: only changed cells touch the DB.
+
+    A cell is (habit_name, day, status). Ticked days are stored as status=True;
+    a habit with no ticks keeps a single (habit_name, 1, False) placeholder row.
+    """
+
+    @staticmethod
+    def grid_cells(df, day_cols) -> set:
+        cells = set()
+        for _, row in df.iterrows():
+            h_clean = str(row["Habit Name"] or "").strip()
+            if not h_clean:
+                continue
+            ticked = {(h_clean, int(d), True) for d in day_cols if row.get(d) == True}
+            cells |= ticked or {(h_clean, 1, False)}
+        return cells
+
+    @staticmethod
+    def sync_grid(user_email: str, month: int, year: int, loaded: set, desired: set) -> Tuple[int, int]:
+        """Apply desired - loaded as inserts and loaded - desired as deletes in one transaction."""
+        from database import transaction, execute_many, bulk_insert
+
+        to_insert = [(user_email, name, month, year, day, status) for name, day, status in desired - loaded]
+        to_delete = [(user_email, name, month, year, day, status) for name, day, status in loaded - desired]
+
+        with transaction() as cur:
+            if to_delete:
+                execute_many("""
+                    DELETE FROM habits h USING (VALUES %s) AS d(user_email, habit_name, month, year, day, status)
+                    WHERE h.user_email = d.user_email AND h.habit_name = d.habit_name AND h.month = d.month
+                    AND h.year = d.year AND h.day = d.day AND h.status = d.status
+                """, to_delete, cur=cur)
+            if to_insert:
+                bulk_insert("habits", ["user_email", "habit_name", "month", "year", "day", "status"], to_insert, cur=cur)
+        return len(to_insert), len(to_delete)
+
+# --- 6. ACTIVE SESSION SERVICE ---
+class ActiveSessionService:
+    """Neural Lock stopwatch state without per-tick queries.
+
+    The row is read once per browser session and the clock is computed locally.
+    Writes bump a process-wide per-user version and NOTIFY `CHANNEL`; a listener
+    thread bumps the version for changes made by other processes/devices, so a
+    fragment reloads as soon as its cached version is stale. The listener runs
+    on a session-mode connection (see database.dedicated_connection), but a
+    live thread does not prove NOTIFYs arrive, so the state is also re-read
+    every ACTIVE_SESSION_RESYNC seconds whatever the listener's state.
+    """
+
+    CHANNEL = "ethos_active_sessions"
+    RESYNC_SECONDS = float(os.environ.get("ACTIVE_SESSION_RESYNC", 15))
+    _versions = {}
+    _lock = threading.Lock()
+    _listener = None
+
+    @classmethod
+    def _bump(cls, user_email: str):
+        with cls._lock:
+            cls._versions[user_email] = cls._versions.get(user_email, 0) + 1
+
+    @classmethod
+    def _listen(cls):
+        from database import dedicated_connection
+        try:
+            conn = dedicated_connection()
+            with conn.cursor() as cur:
+                cur.execute(f"LISTEN {cls.CHANNEL}")
+        except Exception as e:
+            print(f"Active session listener unavailable: {e}")
+            return
+        while True:
+            try:
+                if select.select([conn], [], [], 5) == ([], [], []):
+                    continue
+                conn.poll()
+                while conn.notifies:
+                    cls._bump(conn.notifies.pop(0).payload)
+            except Exception as e:
+                print(f"Active session listener stopped: {e}")
+                return
+
+    @classmethod
+    def listening(cls) -> bool:
+        with cls._lock:
+            if cls._listener is None:
+                cls._listener = threading.Thread(target=cls._listen, name="ethos-session-listener", daemon=True)
+                cls._listener.start()
+        return cls._listener.is_alive()
+
+    @classmethod
+    def version(cls, user_email: str) -> int:
+        return cls._versions.get(user_email, 0)
+
+    @staticmethod
+    def load(user_email: str) -> Optional[ActiveSession]:
+        from database import fetch_query
+        res = fetch_query("SELECT task_name, start_time, is_paused, accumulated_seconds FROM active_sessions WHERE user_email=%s", (user_email,))
+        if not res:
+            return None
+        task_name, start_time, is_paused, acc_sec = res[0]
+        return ActiveSession(task_name=task_name, start_time=start_time, is_paused=is_paused, accumulated_seconds=acc_sec)
+
+    @classmethod
+    def current(cls, user_email: str, state: dict) -> Optional[ActiveSession]:
+        """Return the cached session from `state` (st.session_state), reloading only if stale."""
+        cls.listening()
+        cached = state.get("active_session_cache")
+        version = cls.version(user_email)
+        stale = (
+            cached is None or cached["user"] != user_email or cached["version"] != version
+            or clock.monotonic() - cached["synced_at"] > cls.RESYNC_SECONDS
+        )
+        if stale:
+            cached = {"user": user_email, "version": version, "synced_at": clock.monotonic(), "session": cls.load(user_email)}
+            state["active_session_cache"] = cached
+        return cached["session"]
+
+    @classmethod
+    def _write(cls, user_email: str, statements):
+        from database import transaction
+        with transaction() as cur:
+            for query, params in statements:
+                cur.execute(query, params)
+            cur.execute("SELECT pg_notify(%s, %s)", (cls.CHANNEL, user_email))
+        cls._bump(user_email)
+
+    @classmethod
+    def start(cls, user_email: str, task_name: str):
+        cls._write(user_email, [("INSERT INTO active_sessions (user_email, task_name, start_time, is_paused, accumulated_seconds) VALUES (%s, %s, %s, %s, %s)",
+                                 (user_email, task_name, dt.now(), False, 0))])
+
+    @classmethod
+    def pause(cls, user_email: str, elapsed: int):
+        cls._write(user_email, [("UPDATE active_sessions SET is_paused=True, accumulated_seconds=%s WHERE user_email=%s", (elapsed, user_email))])
+
+    @classmethod
+    def resume(cls, user_email: str):
+        cls._write(user_email, [("UPDATE active_sessions SET is_paused=False, start_time=%s WHERE user_email=%s", (dt.now(), user_email))])
+
+    @classmethod
+    def stop(cls, user_email: str, task_name: str, duration_mins: int):
+        cls._write(user_email, [
+            ("INSERT INTO focus_sessions (user_email, task_name, duration_mins, session_date) VALUES (%s, %s, %s, CURRENT_DATE)", (user_email, task_name, duration_mins)),
+            ("DELETE FROM active_sessions WHERE user_email=%s", (user_email,)),
+        ])
+        invalidate_user_caches(user_email, "focus")
+
+# --- 7. CALENDAR SERVICE ---
+class CalendarService:
+    """Month grid data from one query, expanded into a day -> events index."""
+
+    @staticmethod
+    def load_month(user_email: str, year: int, month: int) -> dict:
+        from database import fetch_query
+
+        span = month_range(month, year)
+        # The recurring branch stays an EXTRACT filter: it is served by the
+        # partial events_user_recurring_idx and only ever sees recurring rows.
+        rows = fetch_query("""
+            SELECT description, is_done, is_recurring, event_date FROM events
+            WHERE user_email=%s
+            AND ((event_date >= %s AND event_date < %s)
+                 OR (is_recurring = TRUE AND EXTRACT(MONTH FROM event_date) = %s))
+            ORDER BY id ASC
+        """, (user_email, span.start, span.end, month))
+
+        days_in_month = calendar.monthrange(year, month)[1]
+        index = {}
+        for desc, is_done, is_recurring, event_date in rows:
+            # Recurring events land on the same day of this month in any year
+            if event_date.month == month and event_date.day <= days_in_month:
+                index.setdefault(event_date.day, []).append(
+                    CalendarEvent(description=desc, is_done=is_done, is_recurring=is_recurring)
+                )
+        return index
+
+    @staticmethod
+    @cached("calendar", ttl=300)
+    def month_index(user_email: str, year: int, month: int) -> dict:
+        # Recurring events touch every year's copy of a month, so writes drop the whole "calendar" tag
+        return CalendarService.load_month(user_email, year, month)
+
+# --- 8. WEEKLY PLANNER SERVICE ---
+class WeeklyPlannerService:
+    """Whole-week planner rows in one query, grouped by day_index and patched after writes."""
+
+    @staticmethod
+    def load_week(user_email: str, week_start: date) -> dict:
+        from database import fetch_query
+
+        rows = fetch_query(
+            "SELECT id, day_index, task_name, is_done FROM weekly_planner WHERE user_email=%s AND week_start=%s ORDER BY day_index ASC, id ASC",
+            (user_email, week_start)
+        )
+        week = {i: [] for i in range(7)}
+        for tid, day_idx, task_name, is_done in rows:
+            week.setdefault(day_idx, []).append(WeeklyTask(id=tid, task_name=task_name, is_done=bool(is_done)))
+        return week
+
+    @staticmethod
+    @cached("planner", ttl=300)
+    def week(user_email: str, week_start: date) -> dict:
+        return WeeklyPlannerService.load_week(user_email, week_start)
+
+    @classmethod
+    def add_task(cls, user_email: str, week_start: date, day_idx: int, task_name: str):
+        from database import transaction
+        with transaction() as cur:
+            cur.execute(
+                "INSERT INTO weekly_planner (user_email, day_index, task_name, week_start, is_done) VALUES (%s, %s, %s, %s, False) RETURNING id",
+                (user_email, day_idx, task_name, week_start)
+            )
+            tid = cur.fetchone()[0]
+        week = cls.week.peek(user_email, week_start)
+        if week is not None:
+            week.setdefault(day_idx, []).append(WeeklyTask(id=tid, task_name=task_name))
+        registry.invalidate(user_email, "dashboard")
+
+    @classmethod
+    def set_done(cls, user_email: str, week_start: date, task_id: int, is_done: bool):
+        """Persist a checkbox; raises DatabaseError and leaves the cached week untouched if the write fails."""
+        from database import transaction
+        with transaction() as cur:
+            cur.execute("UPDATE weekly_planner SET is_done=%s WHERE id=%s AND user_email=%s", (is_done, task_id, user_email))
+        registry.invalidate(user_email, "dashboard")
+        week = cls.week.peek(user_email, week_start)
+        if week is None:
+            return
+        for tasks in week.values():
+            for task in tasks:
+                if task.id == task_id:
+                    task.is_done = is_done
+                    return
+
+# --- 9. TIMETABLE SERVICE ---
+class TimetableService:
+    """A user's whole timetable in one query, indexed by day name and sorted by start time."""
+
+    DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+    @staticmethod
+    def load(user_email: str) -> dict:
+        from database import fetch_query
+
+        rows = fetch_query(
+            "SELECT id, day_name, start_time, subject, location FROM timetable WHERE user_email=%s ORDER BY start_time ASC, id ASC",
+            (user_email,)
+        )
+        index = {day: [] for day in TimetableService.DAYS}
+        for sid, day_name, start_time, subject, location in rows:
+            index.setdefault(day_name, []).append(
+                TimetableSlot(id=sid, day_name=day_name, start_time=start_time, subject=subject, location=location or "")
+            )
+        return index
+
+    @staticmethod
+    @cached("timetable", ttl=600)
+    def week(user_email: str) -> dict:
+        return TimetableService.load(user_email)
+
+    @classmethod
+    def day(cls, user_email: str, day_name: str) -> List[TimetableSlot]:
+        return cls.week(user_email).get(day_name, [])
+
+    @classmethod
+    def all_slots(cls, user_email: str) -> List[TimetableSlot]:
+        """Monday-first, then by start time (the activity manager's order)."""
+        week = cls.week(user_email)
+        return [slot for day in cls.DAYS for slot in week.get(day, [])]
+
+# --- 10. IRON CLAD SERVICE ---
+class IronCladService:
+    MUSCLE_GROUPS = ["Chest", "Back", "Legs", "Shoulders", "Biceps", "Triceps", "Forearms", "Abs"]
+
+    @staticmethod
+    @cached("workouts", ttl=600)
+    def strength_history(user_email: str) -> dict:
+        """Per-exercise daily strength score (Epley 1RM) for every muscle group, split by group.
+
+        One query; the library join is scoped to the same user so exercises that
+        share a name across users don't fan out.
+        """
+        from database import fetch_query
+
+        rows = fetch_query("""
+            SELECT ex.muscle_group, l.workout_date, l.exercise_name, MAX(l.weight * (1 + l.reps / 30.0)) as strength_score
+            FROM workout_logs l
+            JOIN exercise_library ex ON ex.user_email = l.user_email AND ex.exercise_name = l.exercise_name
+            WHERE l.user_email=%s AND l.reps > 0
+            GROUP BY 1, 2, 3 ORDER BY 2 ASC
+        """, (user_email,))
+        history = {group: [] for group in IronCladService.MUSCLE_GROUPS}
+        for group, workout_date, exercise_name, score in rows:
+            history.setdefault(group, []).append((workout_date, exercise_name, score))
+        return history
+
+    @staticmethod
+    def _cell(value) -> Optional[float]:
+        """A data_editor number cell as a float, or None when it is blank, NaN or not a number."""
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            return None
+        return None if math.isnan(number) else number
+
+    @staticmethod
+    def commit_session(user_email: str, week_start: date, entries) -> Tuple[int, int]:
+        """Write a whole session atomically in three statements, however many exercises it has.
+
+        `entries` is an iterable of (group, exercise, weight, reps, sets). Rows
+        without an exercise name or with neither weight nor reps above zero are
+        untouched template rows and ignored; rows where weight or reps is blank
+        or not a number are skipped as incomplete. A blank sets cell counts as 0. Each
+        group's average strength score is folded into muscle_progress with the
+        same running average the page always used: (old + new) / 2.
+        Returns (rows logged, incomplete rows skipped).
+        """
+        from database import transaction, bulk_insert, execute_many
+
+        today = dt.now().date()
+        logs, library, group_scores = [], {}, {}
+        skipped = 0
+        for group, exercise, weight, reps, sets in entries:
+            weight, reps, sets = IronCladService._cell(weight), IronCladService._cell(reps), IronCladService._cell(sets)
+            if not isinstance(exercise, str) or not exercise.strip() or ((weight or 0) <= 0 and (reps or 0) <= 0):
+                continue
+            if weight is None or reps is None:
+                skipped += 1
+                continue
+            reps, sets = int(reps), int(sets or 0)
+            logs.append((user_email, exercise, weight, reps, sets, today))
+            # Last row wins, as it did with one upsert per row; a multi-row upsert can't touch a key twice
+            library[exercise] = (user_email, exercise, group, weight, reps)
+            group_scores.setdefault(group, []).append(weight * (1 + reps / 30.0))
+        if not logs:
+            return 0, skipped
+
+        progress = [(user_email, group, week_start, sum(scores) / len(scores), 1) for group, scores in group_scores.items()]
+        with transaction() as cur:
+            bulk_insert("workout_logs", ["user_email", "exercise_name", "weight", "reps", "sets", "workout_date"], logs, cur=cur)
+            execute_many("""
+                INSERT INTO exercise_library (user_email, exercise_name, muscle_group, last_weight, last_reps) VALUES %s
+                ON CONFLICT (user_email, exercise_name) DO UPDATE SET last_weight=EXCLUDED.last_weight, last_reps=EXCLUDED.last_reps
+            """, list(library.values()), cur=cur)
+            execute_many("""
+                INSERT INTO muscle_progress AS mp (user_email, muscle_group, week_start, volume_sq, frequency) VALUES %s
+                ON CONFLICT (user_email, muscle_group, week_start) DO UPDATE
+                SET volume_sq = (mp.volume_sq + EXCLUDED.volume_sq) / 2, frequency = mp.frequency + 1
+            """, progress, cur=cur)
+        return len(logs), skipped
+
+# --- 11. PANTHEON SERVICE ---
+class PantheonService:
+    @staticmethod
+    def load(user_email: str) -> dict:
+        """Every ranking table and note as {category: [item_name, ...]} in one query.
+
+        Categories come back in name order and entries in rank order, so a
+        note's text is its first (normally only) entry.
+        """
+        from database import fetch_query
+
+        rows = fetch_query(
+            "SELECT category, item_name FROM rankings WHERE user_email=%s ORDER BY category ASC, rank_order ASC, id ASC",
+            (user_email,)
+        )
+        assets = {}
+        for category, item_name in rows:
+            assets.setdefault(category, []).append(item_name)
+        return assets
+
+# --- 12. CACHE INVALIDATOR ---
+def invalidate_user_caches(user_email: str, *domains: str):
+    """Drop only this user's cached results for `domains` (every domain if none given)."""
+    registry.invalidate(user_email, *domains)
@@ -1,18 +1,263 @@
+import os
+import math
 import time
+import queue
+import atexit
+import threading
+from bisect import bisect_right
+from datetime import datetime as dt, timezone
 import streamlit as st
 
+# --- 1. BUFFERED TELEMETRY SINK ---
+TELEMETRY_INSERT = "INSERT INTO system_metrics (user_email, category, event_name, value, metadata, timestamp) VALUES %s"
+ROLLUP_UPSERT = """
+    INSERT INTO telemetry_rollup_minute AS r
+        (bucket_start, category, event_name, page, event_count, error_count, latency_count, latency_sum, latency_hist)
+    VALUES %s
+    ON CONFLICT (bucket_start, category, event_name, page) DO UPDATE SET
+        event_count = r.event_count + EXCLUDED.event_count,
+        error_count = r.error_count + EXCLUDED.error_count,
+        latency_count = r.latency_count + EXCLUDED.latency_count,
+        latency_sum = r.latency_sum + EXCLUDED.latency_sum,
+        latency_hist = ARRAY(SELECT a + b FROM unnest(r.latency_hist, EXCLUDED.latency_hist) AS t(a, b))
+"""
+# Log-scale bucket bounds (seconds): 1ms growing 20% per bucket up to ~56s, so any
+# percentile read from the histogram is within ~10% of the true value. Bucket i
+# counts values in [LATENCY_BOUNDS[i-1], LATENCY_BOUNDS[i]); the last is open-ended.
+# Migration 0007 builds the same bounds in SQL; keep the two in step.
+LATENCY_BOUNDS = tuple(round(0.001 * 1.2 ** i, 6) for i in range(61))
+
+class LatencyHistogram:
+    """Fixed-bucket (HDR-style) latency histogram; histograms merge by adding counts."""
+
+    def __init__(self, counts=None):
+        self.counts = list(counts) if counts else [0] * (len(LATENCY_BOUNDS) + 1)
+
+    @property
+    def total(self):
+        return sum(self.counts)
+
+    def record(self, seconds):
+        self.counts[bisect_right(LATENCY_BOUNDS, seconds)] += 1
+
+    def merge(self, other):
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        return self
+
+    def percentile(self, q):
+        """Approximate q-th percentile (0-100) in seconds, the geometric midpoint of its bucket."""
+        total = self.total
+        if not total:
+            return None
+        rank = max(1, math.ceil(total * q / 100))
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                if i == 0:
+                    return LATENCY_BOUNDS[0] / 2
+                if i == len(LATENCY_BOUNDS):
+                    return LATENCY_BOUNDS[-1]
+                return math.sqrt(LATENCY_BOUNDS[i - 1] * LATENCY_BOUNDS[i])
+        return LATENCY_BOUNDS[-1]
+
+def event_page(event_name, metadata):
+    """Page an event belongs to: metadata['page'], or the X in 'Page_Load: X'."""
+    if metadata.get('page'):
+        return str(metadata['page'])
+    if event_name.startswith('Page_Load: '):
+        return event_name[len('Page_Load: '):]
+    return ''
+
+def fold_minute_buckets(batch):
+    """Aggregate raw event rows into per-(minute, category, event, page) rollup rows."""
+    buckets = {}
+    for user, category, event_name, value, metadata, ts in batch:
+        key = (ts.replace(second=0, microsecond=0), category, event_name, event_page(event_name, metadata))
+        b = buckets.setdefault(key, [0, 0, 0, 0.0, LatencyHistogram()])
+        b[0] += 1
+        if category == 'ERROR':
+            b[1] += 1
+        if category == 'PERFORMANCE':
+            b[2] += 1
+            b[3] += value
+            b[4].record(value)
+    return [key + tuple(b[:4]) + (b[4].counts,) for key, b in buckets.items()]
+
+def maintain_partitions(cur, ahead_days=7, retain_days=0, archive=False):
+    """Create system_metrics day partitions `ahead_days` out and expire those past retention.
+
+    Rows that landed in the default partition get day partitions of their own
+    first, so retention applies to them too. `retain_days` of 0 or less keeps
+    everything. Returns (created, expired).
+    """
+    cur.execute("SELECT system_metrics_rehome_default() + system_metrics_ensure_partitions(current_date, current_date + %s)",
+                (ahead_days,))
+    created = cur.fetchone()[0]
+    expired = 0
+    if retain_days > 0:
+        cur.execute("SELECT system_metrics_expire_partitions(%s, %s)", (retain_days, archive))
+        expired = cur.fetchone()[0]
+    return created, expired
+
+class TelemetryWriter:
+    """Bounded in-process queue drained by a daemon thread into multi-row INSERTs.
+
+    Events are flushed when `flush_size` rows are pending or `flush_interval`
+    seconds have passed. When the queue is full the `policy` decides: 'drop'
+    discards the new event, 'block' waits up to `block_timeout` seconds.
+    Every `maintenance_interval` seconds (and on start) the worker also runs
+    the system_metrics partition maintenance with `retention` settings.
+    """
+
+    def __init__(self, max_size=5000, flush_size=200, flush_interval=2.0, policy="drop", block_timeout=0.5,
+                 maintenance_interval=3600.0, retention=None):
+        if policy not in ("drop", "block"):
+            raise ValueError(f"Unknown telemetry overflow policy: {policy}")
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.maintenance_interval = maintenance_interval
+        self.retention = retention or {}
+        self._next_maintenance = 0.0
+        self.dropped = 0
+        self.flushed = 0
+        self.failed = 0
+        self._queue = queue.Queue(maxsize=max_size)
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._worker = threading.Thread(target=self._run, name="ethos-telemetry", daemon=True)
+        self._worker.start()
+
+    def submit(self, row):
+        try:
+            if self.policy == "block":
+                self._queue.put(row, timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait(row)
+            return True
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+
+    def _drain(self, limit):
+        batch = []
+        while len(batch) < limit:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch):
+        """Raw rows and their minute rollups go in together, so the buckets never drift from system_metrics."""
+        if not batch:
+            return
+        from database import transaction, execute_many
+        from psycopg2.extras import Json
+        try:
+            with transaction() as cur:
+                execute_many(TELEMETRY_INSERT, [row[:4] + (Json(row[4]),) + row[5:] for row in batch], cur=cur)
+                execute_many(ROLLUP_UPSERT, fold_minute_buckets(batch), cur=cur)
+            written = True
+        except Exception as e:
+            print(f"Telemetry Flush Error: {e}")
+            written = False
+        with self._lock:
+            if written:
+                self.flushed += len(batch)
+            else:
+                self.failed += len(batch)
+
+    def _maintain(self):
+        if self.maintenance_interval <= 0 or time.monotonic() < self._next_maintenance:
+            return
+        self._next_maintenance = time.monotonic() + self.maintenance_interval
+        from database import transaction
+        try:
+            with transaction() as cur:
+                maintain_partitions(cur, **self.retention)
+        except Exception as e:
+            print(f"Telemetry Partition Maintenance Error: {e}")
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._maintain()
+            batch = []
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.flush_size and not self._stop.is_set():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._write(batch)
+
+    def flush(self):
+        """Synchronously write everything currently queued."""
+        while True:
+            batch = self._drain(self.flush_size)
+            if not batch:
+                return
+            self._write(batch)
+
+    def close(self, timeout=5.0):
+        self._stop.set()
+        self._worker.join(timeout)
+        self.flush()
+
+    def stats(self):
+        with self._lock:
+            return {"queued": self._queue.qsize(), "flushed": self.flushed,
+                    "dropped": self.dropped, "failed": self.failed, "policy": self.policy}
+
+def retention_settings():
+    """Partition maintenance settings from TELEMETRY_PARTITIONS_AHEAD / _RETENTION_DAYS / _ARCHIVE_EXPIRED."""
+    return {
+        "ahead_days": int(os.environ.get("TELEMETRY_PARTITIONS_AHEAD", 7)),
+        # Retention is opt-in: expired partitions are dropped for good unless archived
+        "retain_days": int(os.environ.get("TELEMETRY_RETENTION_DAYS", 0)),
+        "archive": os.environ.get("TELEMETRY_ARCHIVE_EXPIRED", "false").lower() in ("1", "true", "yes"),
+    }
+
+_writer = None
+_writer_lock = threading.Lock()
+
+def get_telemetry_writer():
+    """Process-wide writer, configured from TELEMETRY_* environment variables."""
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = TelemetryWriter(
+                    max_size=int(os.environ.get("TELEMETRY_BUFFER_SIZE", 5000)),
+                    flush_size=int(os.environ.get("TELEMETRY_FLUSH_SIZE", 200)),
+                    flush_interval=float(os.environ.get("TELEMETRY_FLUSH_INTERVAL", 2.0)),
+                    policy=os.environ.get("TELEMETRY_OVERFLOW_POLICY", "drop"),
+                    maintenance_interval=float(os.environ.get("TELEMETRY_MAINTENANCE_INTERVAL", 3600)),
+                    retention=retention_settings(),
+                )
+                atexit.register(_writer.close)
+    return _writer
+
+# --- 2. PUBLIC API ---
 class Telemetry:
     @staticmethod
     def log(category, event_name, value=0.0, metadata=None):
-        """Universal logger using a Local Import to break the circular loop."""
-        from database import execute_query 
-        
+        """Queue one event; the user and timestamp are captured on the calling thread."""
         user = st.session_state.get('user_email', 'ANONYMOUS')
-        execute_query(
-            "INSERT INTO system_metrics (user_email, category, event_name, value, metadata) VALUES (%s, %s, %s, %s, %s)",
-            (user, category, event_name, value, metadata if metadata else {})
+        get_telemetry_writer().submit(
+            (user, category, event_name, float(value or 0.0), metadata if metadata else {}, dt.now(timezone.utc))
         )
 
+    @staticmethod
+    def stats():
+        return get_telemetry_writer().stats()
+
     @staticmethod
     def track_latency(event_name):
         class LatencyTracker:
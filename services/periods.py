@@ -0,0 +1,34 @@
+import calendar
+from datetime import date, timedelta
+from typing import NamedTuple, Optional
+
+class DateRange(NamedTuple):
+    """Half-open [start, end) date range.
+
+    Query with `col >= start AND col < end` so a B-tree index on `col` can be
+    used; EXTRACT(MONTH/YEAR FROM col) = ... predicates cannot.
+    """
+    start: date
+    end: date
+
+    def __contains__(self, day):
+        return self.start <= day < self.end
+
+def month_range(month: int, year: int) -> DateRange:
+    start = date(year, month, 1)
+    return DateRange(start, (start + timedelta(days=32)).replace(day=1))
+
+def this_month(today: Optional[date] = None) -> DateRange:
+    today = today or date.today()
+    return month_range(today.month, today.year)
+
+def week_range(day: Optional[date] = None) -> DateRange:
+    """Monday-to-Monday week containing `day`."""
+    day = day or date.today()
+    start = day - timedelta(days=day.weekday())
+    return DateRange(start, start + timedelta(days=7))
+
+def period_range(period: str) -> DateRange:
+    """Range for a Finances period label such as 'October 2026'."""
+    month_name, year = period.split()
+    return month_range(list(calendar.month_name).index(month_name), int(year))
@@ -0,0 +1,134 @@
+import os
+import re
+import time
+import functools
+import threading
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+
+from services.observability import Telemetry, LatencyHistogram
+
+_COMMENTS = re.compile(r"--[^\n]*|/\*.*?\*/", re.S)
+_STRINGS = re.compile(r"'(?:[^']|'')*'")
+_PLACEHOLDERS = re.compile(r"%\(\w+\)s|%s")
+_NUMBERS = re.compile(r"\b\d+(?:\.\d+)?\b")
+_LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACE = re.compile(r"\s+")
+
+# One page run's per-fingerprint call counts, set by query_run() (utils.ethos_observe wraps every page
+# in one). Widget callbacks run before the page function, outside any run, so they are never counted.
+_run = contextvars.ContextVar("ethos_query_run", default=None)
+
+@contextmanager
+def query_run(page):
+    """Count a page run (or a fragment within it) on its own, then restore the outer run."""
+    token = _run.set({"page": page, "counts": {}})
+    try:
+        yield
+    finally:
+        _run.reset(token)
+
+@functools.lru_cache(maxsize=1024)
+def fingerprint(query):
+    """Normalized SQL shape: literals and placeholders become ?, IN-lists collapse, whitespace folds."""
+    text = query.decode() if isinstance(query, bytes) else str(query)
+    text = _COMMENTS.sub(" ", text)
+    text = _STRINGS.sub("?", text)
+    text = _PLACEHOLDERS.sub("?", text)
+    text = _NUMBERS.sub("?", text)
+    text = _LISTS.sub("(?...)", text)
+    return _SPACE.sub(" ", text).strip()
+
+class QueryStats:
+    """Per-fingerprint timing for fetch_query/execute_query, plus a bounded slow-query log.
+
+    Counters are process-local, like the pool and cache stats. Calls slower than
+    `slow_ms` are also kept in the slow log and sent to telemetry as SLOW_QUERY.
+    When one page run issues the same fingerprint `n_plus_one_at` times, the
+    run is flagged as an N+1 (telemetry N_PLUS_ONE, once per run and shape) and
+    every call past the first counts as a wasted round-trip for that offender.
+    """
+
+    def __init__(self, slow_ms=200.0, slow_log_size=100, n_plus_one_at=5):
+        self.slow_ms = slow_ms
+        self.n_plus_one_at = n_plus_one_at
+        self._by_fingerprint = {}
+        self._offenders = {}
+        self._slow = deque(maxlen=slow_log_size)
+        self._lock = threading.Lock()
+
+    def record(self, query, seconds, rows, failed=False):
+        fp = fingerprint(query)
+        with self._lock:
+            s = self._by_fingerprint.get(fp)
+            if s is None:
+                s = self._by_fingerprint[fp] = {"calls": 0, "total_s": 0.0, "rows": 0, "errors": 0,
+                                                "hist": LatencyHistogram()}
+            s["calls"] += 1
+            s["total_s"] += seconds
+            s["rows"] += rows
+            s["errors"] += int(failed)
+            s["hist"].record(seconds)
+            slow = seconds * 1000 >= self.slow_ms
+            if slow:
+                self._slow.append({"at": time.time(), "fingerprint": fp, "ms": seconds * 1000,
+                                   "rows": rows, "failed": failed})
+            flagged = self._count_in_run(fp)
+        if slow:
+            Telemetry.log('SLOW_QUERY', 'Slow_Query', value=seconds,
+                          metadata={"fingerprint": fp, "rows": rows, "failed": failed})
+        if flagged:
+            Telemetry.log('N_PLUS_ONE', 'N_Plus_One', value=self.n_plus_one_at,
+                          metadata={"page": flagged, "fingerprint": fp})
+
+    def _count_in_run(self, fp):
+        """Count `fp` against the current page run; returns the page name when this call crosses the threshold."""
+        run = _run.get()
+        if run is None or self.n_plus_one_at <= 1:
+            return None
+        n = run["counts"][fp] = run["counts"].get(fp, 0) + 1
+        if n < self.n_plus_one_at:
+            return None
+        o = self._offenders.get((run["page"], fp))
+        if o is None:
+            o = self._offenders[(run["page"], fp)] = {"runs": 0, "wasted": 0, "worst": 0, "last_seen": 0.0}
+        # Crossing the threshold books the calls so far; each later call adds one more
+        o["wasted"] += (n - 1) if n == self.n_plus_one_at else 1
+        o["worst"] = max(o["worst"], n)
+        o["last_seen"] = time.time()
+        if n == self.n_plus_one_at:
+            o["runs"] += 1
+            return run["page"]
+        return None
+
+    def top(self, by="total_s", limit=20):
+        """Fingerprint summaries sorted descending by 'total_s', 'calls' or 'p95_s'."""
+        with self._lock:
+            report = [
+                {"fingerprint": fp, "calls": s["calls"], "total_s": s["total_s"], "rows": s["rows"],
+                 "errors": s["errors"], "avg_s": s["total_s"] / s["calls"], "p95_s": s["hist"].percentile(95)}
+                for fp, s in self._by_fingerprint.items()
+            ]
+        return sorted(report, key=lambda r: r[by], reverse=True)[:limit]
+
+    def n_plus_one(self, limit=20):
+        """Flagged (page, fingerprint) shapes, most wasted round-trips first."""
+        with self._lock:
+            report = [dict(o, page=page, fingerprint=fp) for (page, fp), o in self._offenders.items()]
+        return sorted(report, key=lambda r: r["wasted"], reverse=True)[:limit]
+
+    def slow_log(self):
+        with self._lock:
+            return list(reversed(self._slow))
+
+    def reset(self):
+        with self._lock:
+            self._by_fingerprint.clear()
+            self._offenders.clear()
+            self._slow.clear()
+
+query_stats = QueryStats(
+    slow_ms=float(os.environ.get("SLOW_QUERY_MS", 200)),
+    n_plus_one_at=int(os.environ.get("N_PLUS_ONE_THRESHOLD", 5)),
+)
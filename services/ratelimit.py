@@ -0,0 +1,72 @@
+import time
+import threading
+from collections import OrderedDict
+
+from services.observability import Telemetry
+
+# action -> (burst size, window seconds): `limit` actions per `window`, refilled continuously
+RATE_LIMITS = {
+    "login": (5, 60),
+    "write": (30, 60),
+    "admin_read": (30, 60),
+}
+DEFAULT_LIMIT = (10, 60)
+
+class TokenBucketLimiter:
+    """Process-wide token buckets keyed by (user, action); every check is O(1).
+
+    Shared by all sessions in the process, so several tabs of one user draw on
+    the same bucket. A bucket refills at limit/window tokens per second up to
+    `limit`. The first throttled call of a streak is logged to telemetry as
+    SECURITY 'Rate_Limited: <action>'; per-action counts are in stats().
+    At most `max_keys` buckets are kept: they are ordered by last use and the
+    least recently used one is evicted in O(1) when a new key would exceed the
+    cap. An evicted bucket starts full again, which only errs towards allowing
+    requests for keys idle long enough to fall off the end.
+    """
+
+    def __init__(self, limits=None, default=DEFAULT_LIMIT, max_keys=10000):
+        self.limits = dict(limits or {})
+        self.default = default
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def _rule(self, action):
+        limit, window = self.limits.get(action, self.default)
+        return limit, limit / window
+
+    def acquire(self, user, action, cost=1):
+        """Spend `cost` tokens; returns (allowed, seconds until enough tokens are available)."""
+        limit, rate = self._rule(action)
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get((user, action))
+            if bucket is None:
+                while len(self._buckets) >= self.max_keys:
+                    self._buckets.popitem(last=False)
+                bucket = self._buckets[(user, action)] = [float(limit), now, False]
+            else:
+                self._buckets.move_to_end((user, action))
+            tokens = min(limit, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+            counts = self._stats.setdefault(action, {"allowed": 0, "throttled": 0})
+            if tokens >= cost:
+                bucket[0], bucket[2] = tokens - cost, False
+                counts["allowed"] += 1
+                return True, 0.0
+            bucket[0] = tokens
+            counts["throttled"] += 1
+            first_in_streak = not bucket[2]
+            bucket[2] = True
+        if first_in_streak:
+            Telemetry.log('SECURITY', f'Rate_Limited: {action}', metadata={'user': user, 'action': action})
+        return False, (cost - tokens) / rate
+
+    def stats(self):
+        with self._lock:
+            return {action: dict(c, tracked=sum(1 for (_, a) in self._buckets if a == action))
+                    for action, c in self._stats.items()}
+
+limiter = TokenBucketLimiter(RATE_LIMITS)
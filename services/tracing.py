@@ -0,0 +1,184 @@
+import os
+import json
+import time
+import uuid
+import random
+import threading
+import contextvars
+from contextlib import contextmanager
+
+# Where finished traces go: 'jsonl' (TRACE_FILE), 'db' (trace_spans table) or 'off'.
+# Only a sample of page runs is traced; set TRACE_SAMPLE_RATE=1 to trace every run.
+TRACE_EXPORT = os.environ.get("TRACE_EXPORT", "jsonl")
+TRACE_FILE = os.environ.get("TRACE_FILE", "traces.jsonl")
+TRACE_FILE_MAX_BYTES = int(os.environ.get("TRACE_FILE_MAX_BYTES", 5_000_000))
+TRACE_SAMPLE_RATE = float(os.environ.get("TRACE_SAMPLE_RATE", 0.05))
+SPAN_INSERT = "INSERT INTO trace_spans (trace_id, span_id, parent_id, name, started_at, duration_ms, attrs) VALUES %s"
+
+_current = contextvars.ContextVar("ethos_span", default=None)
+_file_lock = threading.Lock()
+
+class Span:
+    """One timed step of a traced script run; children share the root's `finished` list."""
+
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "attrs", "started_at", "duration_ms", "_t0", "finished")
+
+    def __init__(self, name, parent=None, attrs=None):
+        self.trace_id = parent.trace_id if parent else uuid.uuid4().hex
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent.span_id if parent else None
+        self.name = name
+        self.attrs = dict(attrs or {})
+        self.finished = parent.finished if parent else []
+        self.started_at = time.time()
+        self.duration_ms = None
+        self._t0 = time.perf_counter()
+
+    def to_dict(self):
+        return {"trace_id": self.trace_id, "span_id": self.span_id, "parent_id": self.parent_id,
+                "name": self.name, "started_at": self.started_at, "duration_ms": self.duration_ms,
+                "attrs": self.attrs}
+
+@contextmanager
+def _open(name, parent, attrs):
+    s = Span(name, parent, attrs)
+    token = _current.set(s)
+    try:
+        yield s
+    except Exception as e:
+        s.attrs["error"] = type(e).__name__
+        raise
+    finally:
+        s.duration_ms = (time.perf_counter() - s._t0) * 1000
+        _current.reset(token)
+        s.finished.append(s)
+
+@contextmanager
+def trace(name, **attrs):
+    """Root span for one script run; the whole span tree is exported when it closes.
+
+    Nested inside an active trace it is just a child span. Runs not picked by
+    TRACE_SAMPLE_RATE yield None and their span() calls are no-ops.
+    """
+    parent = _current.get()
+    if parent is not None:
+        with _open(name, parent, attrs) as s:
+            yield s
+        return
+    if TRACE_EXPORT == "off" or random.random() >= TRACE_SAMPLE_RATE:
+        yield None
+        return
+    root = None
+    try:
+        with _open(name, None, attrs) as root:
+            yield root
+    finally:
+        if root is not None:
+            export(root.finished)
+
+@contextmanager
+def span(name, **attrs):
+    """Child span of the active trace; does nothing (yields None) outside a trace."""
+    parent = _current.get()
+    if parent is None:
+        yield None
+        return
+    with _open(name, parent, attrs) as s:
+        yield s
+
+def _rotate():
+    """Keep the JSON-lines file under TRACE_FILE_MAX_BYTES; the previous file is kept as TRACE_FILE.1."""
+    try:
+        if os.path.getsize(TRACE_FILE) >= TRACE_FILE_MAX_BYTES:
+            os.replace(TRACE_FILE, TRACE_FILE + ".1")
+    except FileNotFoundError:
+        pass
+
+def export(spans):
+    """Write finished spans to the configured sink; tracing never breaks the page."""
+    try:
+        if TRACE_EXPORT == "jsonl":
+            lines = "".join(json.dumps(s.to_dict(), default=str) + "\n" for s in spans)
+            with _file_lock:
+                _rotate()
+                with open(TRACE_FILE, "a") as f:
+                    f.write(lines)
+        elif TRACE_EXPORT == "db":
+            from datetime import datetime, timezone
+            from psycopg2.extras import Json
+            from database import transaction, execute_many
+            with transaction() as cur:
+                execute_many(SPAN_INSERT, [
+                    (s.trace_id, s.span_id, s.parent_id, s.name,
+                     datetime.fromtimestamp(s.started_at, timezone.utc), s.duration_ms, Json(s.attrs))
+                    for s in spans
+                ], cur=cur)
+    except Exception as e:
+        print(f"Trace Export Error: {e}")
+
+# --- READING TRACES BACK (Admin waterfall) ---
+def _tail_records(max_bytes=2_000_000):
+    if not os.path.exists(TRACE_FILE):
+        return []
+    with open(TRACE_FILE, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        f.seek(max(0, size - max_bytes))
+        chunk = f.read().decode("utf-8", errors="ignore")
+    lines = chunk.splitlines()
+    if size > max_bytes:
+        lines = lines[1:]  # first line is probably cut
+    records = []
+    for line in lines:
+        try:
+            records.append(json.loads(line))
+        except ValueError:
+            continue
+    return records
+
+def recent_traces(limit=50):
+    """Root spans of the most recent traces, newest first."""
+    if TRACE_EXPORT == "db":
+        from database import fetch_query
+        rows = fetch_query("""
+            SELECT trace_id, span_id, name, EXTRACT(EPOCH FROM started_at), duration_ms, attrs
+            FROM trace_spans
+            WHERE parent_id IS NULL AND started_at >= NOW() - INTERVAL '7 days'
+            ORDER BY started_at DESC LIMIT %s
+        """, (limit,))
+        return [{"trace_id": r[0], "span_id": r[1], "parent_id": None, "name": r[2],
+                 "started_at": float(r[3]), "duration_ms": r[4], "attrs": r[5]} for r in rows]
+    roots = [r for r in _tail_records() if r.get("parent_id") is None]
+    return sorted(roots, key=lambda r: r["started_at"], reverse=True)[:limit]
+
+def load_trace(trace_id):
+    """Every span of one trace, ordered by start time."""
+    if TRACE_EXPORT == "db":
+        from database import fetch_query
+        rows = fetch_query("""
+            SELECT trace_id, span_id, parent_id, name, EXTRACT(EPOCH FROM started_at), duration_ms, attrs
+            FROM trace_spans WHERE trace_id = %s
+        """, (trace_id,))
+        spans = [{"trace_id": r[0], "span_id": r[1], "parent_id": r[2], "name": r[3],
+                  "started_at": float(r[4]), "duration_ms": r[5], "attrs": r[6]} for r in rows]
+    else:
+        spans = [r for r in _tail_records() if r.get("trace_id") == trace_id]
+    return sorted(spans, key=lambda r: r["started_at"])
+
+def waterfall_rows(spans):
+    """(depth, offset_ms, span) rows in tree order for rendering a waterfall."""
+    if not spans:
+        return []
+    children = {}
+    for s in spans:
+        children.setdefault(s["parent_id"], []).append(s)
+    t0 = min(s["started_at"] for s in spans)
+    rows = []
+
+    def walk(parent_id, depth):
+        for s in sorted(children.get(parent_id, []), key=lambda s: s["started_at"]):
+            rows.append((depth, (s["started_at"] - t0) * 1000, s))
+            walk(s["span_id"], depth + 1)
+
+    walk(None, 0)
+    return rows
@@ -0,0 +1,37 @@
+"""Shared fixtures for the page query-budget tests.
+
+The tests need a real Postgres (DATABASE_URL, e.g. the docker-compose db);
+without one they are skipped. The schema is migrated and one synthetic user
+is seeded for the session, then removed again.
+"""
+import os
+
+import pytest
+
+TEST_USER_NO = 990001
+SEED_YEARS = 1
+
+
+@pytest.fixture(scope="session")
+def seeded_user():
+    if not (os.environ.get("DATABASE_URL") or os.environ.get("DB_HOST")):
+        pytest.skip("query-budget tests need a seeded Postgres (set DATABASE_URL)")
+
+    from database import dedicated_connection
+    from migrations import apply_migrations
+    from benchmarks.dataset import bench_user, clear, seed
+
+    user = bench_user(TEST_USER_NO)
+    conn = dedicated_connection()
+    try:
+        conn.autocommit = False
+        apply_migrations(conn)
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            clear(cur, user)
+            seed(cur, TEST_USER_NO, TEST_USER_NO, SEED_YEARS)
+        yield user
+        with conn.cursor() as cur:
+            clear(cur, user)
+    finally:
+        conn.close()
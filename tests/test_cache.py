@@ -0,0 +1,37 @@
+"""The service cache registry stays bounded in a long-running process."""
+from services.cache import CacheRegistry
+
+
+def test_registry_caps_entries_lru():
+    registry = CacheRegistry(max_entries=3)
+    for day in range(3):
+        registry.set(("week", "a@x", day), day, "a@x", ("planner",))
+    registry.get(("week", "a@x", 0))  # touch: day 1 is now least recently used
+    registry.set(("week", "a@x", 3), 3, "a@x", ("planner",))
+
+    assert len(registry._data) == 3
+    assert registry.get(("week", "a@x", 1)) is None
+    assert registry.get(("week", "a@x", 0)) == 0
+
+
+def test_registry_sweeps_expired_entries_on_set(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("services.cache.time.monotonic", lambda: now[0])
+    registry = CacheRegistry(max_entries=100, sweep_interval=0)
+    for day in range(50):
+        registry.set(("month", "a@x", day), day, "a@x", ("calendar",), ttl=10)
+    now[0] += 11
+    registry.set(("month", "b@x", 0), 0, "b@x", ("calendar",), ttl=10)
+
+    assert list(registry._data) == [("month", "b@x", 0)]
+    assert ("a@x", "calendar") not in registry._tags
+
+
+def test_registry_stays_bounded_under_many_keys():
+    registry = CacheRegistry(max_entries=64)
+    for n in range(10000):
+        user = f"u{n % 50}@x"
+        registry.set(("day", user, n), n, user, ("dashboard", "focus"))
+
+    assert len(registry._data) == 64
+    assert sum(len(keys) for keys in registry._tags.values()) == 2 * 64
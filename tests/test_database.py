@@ -0,0 +1,19 @@
+"""bulk_insert keeps values intact on both of its load paths."""
+import pytest
+
+ROWS = [(1, "", None), (2, None, ""), (3, 'a "quoted", \\N line\nbreak', "x")]
+
+
+@pytest.mark.parametrize("method", ["values", "copy"])
+def test_bulk_insert_round_trips_empty_strings_and_nulls(seeded_user, method):
+    from database import bulk_insert, dedicated_connection
+
+    conn = dedicated_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("CREATE TEMP TABLE bulk_probe (id INT, a TEXT, b TEXT)")
+            assert bulk_insert("bulk_probe", ("id", "a", "b"), ROWS, cur=cur, method=method) == 3
+            cur.execute("SELECT id, a, b FROM bulk_probe ORDER BY id")
+            assert cur.fetchall() == ROWS
+    finally:
+        conn.close()
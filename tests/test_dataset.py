@@ -0,0 +1,11 @@
+"""The synthetic benchmark dataset exercises the joins the pages depend on."""
+
+
+def test_strength_history_joins_seeded_workouts(seeded_user):
+    from benchmarks.suite import check_dataset
+    from services.logic import IronCladService
+
+    history = IronCladService.strength_history.__wrapped__(seeded_user)
+
+    assert all(history[group] for group in ("Chest", "Back", "Legs", "Shoulders", "Biceps", "Triceps"))
+    check_dataset([seeded_user])
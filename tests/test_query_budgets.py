@@ -0,0 +1,70 @@
+"""Run every page headlessly with AppTest and hold it to a query and render-time budget.
+
+Budgets are for a cold service cache and the conftest dataset (one user, one
+year of history, three ranking tables and one note). A page that starts
+issuing a query per row/day/category blows its query budget here before it
+reaches production. Set QUERY_BUDGET_TIME_SCALE to loosen the render-time
+budgets on slow machines.
+"""
+import os
+import time
+from pathlib import Path
+
+import pytest
+
+AppTest = pytest.importorskip("streamlit.testing.v1").AppTest
+
+from services.cache import registry
+from services.querylog import query_stats
+
+ROOT = Path(__file__).resolve().parent.parent
+TIME_SCALE = float(os.environ.get("QUERY_BUDGET_TIME_SCALE", 1.0))
+
+# page script -> (max fetch_query/execute_query calls per cold run, max render seconds)
+PAGE_BUDGETS = {
+    "Home.py": (2, 3.0),                 # dashboard snapshot + timetable
+    "pages/Admin.py": (5, 3.0),          # rollup histograms, health, KPIs, latency series, event feed
+    "pages/Blueprint.py": (1, 2.0),
+    "pages/Calendar.py": (2, 2.0),       # month index + manage list
+    "pages/Finances.py": (3, 3.0),       # budget vs actual, debt, spend trend
+    "pages/Habits.py": (1, 3.0),
+    "pages/Iron_Clad.py": (2, 3.0),      # history stays unloaded until a toggle is switched on
+    "pages/Neural_lock.py": (5, 3.0),    # stats, month series, active session, manage + view logs
+    "pages/Pantheon.py": (1, 2.0),       # every table and note in one query
+    "pages/Timetable.py": (1, 2.0),
+    "pages/Weekly.py": (1, 2.0),
+}
+
+
+def run_page(script, user):
+    at = AppTest.from_file(str(ROOT / script), default_timeout=30)
+    at.session_state["logged_in"] = True
+    at.session_state["user_email"] = user
+    at.session_state["role"] = "admin"
+    registry.invalidate(user)
+    query_stats.reset()
+    start = time.perf_counter()
+    at.run()
+    return at, time.perf_counter() - start
+
+
+def describe(queries):
+    return "\n".join(f"  {q['calls']:>3}x {q['fingerprint'][:120]}" for q in queries)
+
+
+@pytest.mark.parametrize("script", sorted(PAGE_BUDGETS))
+def test_page_within_budget(script, seeded_user):
+    max_queries, max_seconds = PAGE_BUDGETS[script]
+    at, elapsed = run_page(script, seeded_user)
+
+    assert not at.exception, f"{script} raised: {at.exception}"
+    # Pages catch their own crashes (ethos_observe, Home's render guard) and show st.error instead
+    assert not at.error, f"{script} rendered errors: {[e.value for e in at.error]}"
+    queries = query_stats.top(by="calls", limit=None)
+    issued = sum(q["calls"] for q in queries)
+    assert issued <= max_queries, (
+        f"{script} issued {issued} queries (budget {max_queries}):\n{describe(queries)}"
+    )
+    assert elapsed <= max_seconds * TIME_SCALE, (
+        f"{script} took {elapsed:.2f}s to render (budget {max_seconds * TIME_SCALE:.2f}s)"
+    )
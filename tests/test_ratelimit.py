@@ -0,0 +1,31 @@
+"""The process-wide rate limiter keeps a bounded number of buckets."""
+import pytest
+
+pytest.importorskip("streamlit")
+
+from services.observability import Telemetry
+from services.ratelimit import TokenBucketLimiter
+
+
+@pytest.fixture(autouse=True)
+def quiet_telemetry(monkeypatch):
+    monkeypatch.setattr(Telemetry, "log", staticmethod(lambda *args, **kwargs: None))
+
+
+def test_bucket_table_never_exceeds_max_keys():
+    limiter = TokenBucketLimiter({"login": (5, 60)}, max_keys=2)
+    for n in range(6):
+        limiter.acquire(f"user{n}@x", "login")
+        assert len(limiter._buckets) <= 2
+    assert limiter.stats()["login"]["tracked"] == 2
+
+
+def test_least_recently_used_bucket_is_evicted():
+    limiter = TokenBucketLimiter({"login": (1, 60)}, max_keys=2)
+    assert limiter.acquire("a@x", "login")[0]
+    assert limiter.acquire("b@x", "login")[0]
+    assert not limiter.acquire("a@x", "login")[0]  # a is throttled and now most recently used
+    limiter.acquire("c@x", "login")                 # evicts b, not a
+
+    assert ("b@x", "login") not in limiter._buckets
+    assert not limiter.acquire("a@x", "login")[0]
@@ -4,6 +4,9 @@ from streamlit_cookies_controller import CookieController
 import functools
 import traceback
 from services.observability import Telemetry
+from services.tracing import trace
+from services.querylog import query_run
+from services.ratelimit import limiter
 
 def ethos_observe(page_name):
     """Decorator to automatically track performance and catch errors for any page."""
@@ -14,7 +17,8 @@ def ethos_observe(page_name):
             
             # 1. Track Performance & Catch Crashes
             try:
-                with Telemetry.track_latency(f"Page_Load: {page_name}"):
+                with trace(f"Page_Load: {page_name}", page=page_name), query_run(page_name), \
+                        Telemetry.track_latency(f"Page_Load: {page_name}"):
                     return func(*args, **kwargs)
             except Exception as e:
                 # 2. Log Crash Details for Admin Page
@@ -30,22 +34,13 @@ def ethos_observe(page_name):
         return wrapper
     return decorator
 
-def check_rate_limit(limit=10, window=60):
-    """
-    Limits a user to 'limit' actions every 'window' seconds.
-    """
-    if 'request_history' not in st.session_state:
-        st.session_state.request_history = []
-
-    current_time = time.time()
-    st.session_state.request_history = [
-        t for t in st.session_state.request_history if current_time - t < window
-    ]
-
-    if len(st.session_state.request_history) >= limit:
-        return False 
-    st.session_state.request_history.append(current_time)
-    return True
+def check_rate_limit(action="write", user=None):
+    """Spend one token from the user's process-wide `action` bucket; warns and returns False when throttled."""
+    user = user or st.session_state.get('user_email', 'ANONYMOUS')
+    allowed, retry_after = limiter.acquire(user, action)
+    if not allowed:
+        st.warning(f"Too many {action.replace('_', ' ')} requests. Try again in {max(1, round(retry_after))}s.")
+    return allowed
 
 def render_sidebar():
     controller = CookieController()